@@ -0,0 +1,61 @@
+"""
+Compares the in-memory FacetIndex with the SQLite QueryEngine behind get_questions_by_categories.
+
+Run from the repository root:  python -m benchmarks.facet_index [rows]
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+from main import PAGE_SIZE
+from pdfCache import getLink
+from queryEngine import QueryEngine
+from facetIndex import FacetIndex
+from benchmarks.synthetic import make_database
+from benchmarks.query_engine import CASES, timed
+
+def with_links(rows: list[tuple]) -> list[tuple]:
+    return [row + (getLink(int(row[1]), row[2], row[3]),) for row in rows]
+
+def main(rows: int = 100_000) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_database(os.path.join(tmp, "questions.db"), rows)
+        engine = QueryEngine(path)
+
+        t0 = time.perf_counter()
+        index = FacetIndex(path)
+        print(f"{rows} synthetic questions, index built in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        mismatches = 0
+        for categories in CASES:
+            sqlite_time, sqlite_rows = timed(lambda: with_links(engine.find(categories)))
+            bitmap_time, bitmap_rows = timed(lambda: with_links(index.find(categories)))
+            agree = set(sqlite_rows) == set(bitmap_rows)
+            mismatches += not agree
+            print(f"\n{categories}")
+            print(f"  sqlite  {sqlite_time * 1000:8.3f} ms  rows={len(sqlite_rows)}")
+            print(f"  bitmap  {bitmap_time * 1000:8.3f} ms  rows={len(bitmap_rows)}  {'agree' if agree else 'DIFFER'}")
+
+            # What the UI actually runs: the first ranked page plus the total
+            sqlite_time, sqlite_page = timed(lambda: (engine.page(categories, PAGE_SIZE), engine.count(categories)))
+            bitmap_time, bitmap_page = timed(lambda: (index.page(categories, PAGE_SIZE), index.count(categories)))
+            agree = sqlite_page == bitmap_page
+            mismatches += not agree
+            print(f"  first page + count: sqlite {sqlite_time * 1000:.3f} ms  bitmap {bitmap_time * 1000:.3f} ms  "
+                  f"{'agree' if agree else 'DIFFER'}")
+
+        # One committed insert from another connection bumps data_version for the index
+        conn = sqlite3.connect(path)
+        conn.execute("INSERT OR REPLACE INTO questions VALUES ('y1990p1q1', '1990', 'Paper 1', "
+                     "'Question 1', 'Graph Algorithms', 'Algorithms 1', 'Hard')")
+        conn.commit()
+        conn.close()
+        refresh_time, found = timed(lambda: index.find(["1990"]), repeat=1)
+        print(f"\nincremental refresh + search after one insert: {refresh_time * 1000:.2f} ms, rows={len(found)}")
+        index.close()
+    return mismatches
+
+if __name__ == "__main__":
+    sys.exit(1 if main(*(int(a) for a in sys.argv[1:])) else 0)
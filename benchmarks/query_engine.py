@@ -0,0 +1,83 @@
+"""
+Compares the original OR-of-LIKE category query with queryEngine on a synthetic database.
+
+Run from the repository root:  python -m benchmarks.query_engine [rows]
+"""
+import os
+import re
+import sys
+import time
+import sqlite3
+import tempfile
+
+from queryEngine import QueryEngine, FIELDS
+from benchmarks.synthetic import make_database
+
+CASES = [
+    ["2020"],
+    ["2019", "2020", "2021", "Paper 2", "Hard"],
+    ["Graph Algorithms"],
+    ["Number Theory", "Modular Arithmetic", "Chinese Remainder Theorem"],
+    ["Paper 1", "Question 5", "Finite Automata", "Regular Languages"],
+    ["O'Reilly's \"Theorem\""],
+]
+
+def legacy_query(categories: list[str]) -> str:
+    """The SQL the app used to build: six clauses per category, string-interpolated and OR-ed."""
+    where_clauses = []
+    for cat in categories:
+        where_clauses.append(f"Year = '{cat}'")
+        where_clauses.append(f"Paper = '{cat}'")
+        where_clauses.append(f"QuestionNumber = '{cat}'")
+        where_clauses.append(f"Topics LIKE '%{cat}%'")
+        where_clauses.append(f"Module LIKE '%{cat}%'")
+        where_clauses.append(f"Difficulty = '{cat}'")
+    return f"SELECT {', '.join(FIELDS)} FROM questions WHERE {' OR '.join(where_clauses)}"
+
+def timed(fn, repeat: int = 20) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+def full_scan(plan: list[str]) -> bool:
+    # The engine aliases the table as q; the FTS and text tables don't count
+    return any(re.match(r"SCAN (questions|q)\b(?!_)", detail) for detail in plan)
+
+def main(rows: int = 100_000) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_database(os.path.join(tmp, "questions.db"), rows)
+        engine = QueryEngine(path)
+        conn = sqlite3.connect(path)
+        failures = 0
+
+        print(f"{rows} synthetic questions")
+        for categories in CASES:
+            legacy_sql = legacy_query(categories)
+
+            def run_legacy():
+                try:
+                    return conn.execute(legacy_sql).fetchall()
+                except sqlite3.Error as e:
+                    return e
+
+            legacy_time, legacy_rows = timed(run_legacy)
+            engine_time, engine_rows = timed(lambda: engine.find(categories))
+            plan = engine.explain(categories)
+            legacy_plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {legacy_sql}")] \
+                if not isinstance(legacy_rows, sqlite3.Error) else ["(query fails)"]
+
+            legacy_count = legacy_rows if isinstance(legacy_rows, sqlite3.Error) else len(legacy_rows)
+            print(f"\n{categories}")
+            print(f"  legacy  {legacy_time * 1000:8.2f} ms  rows={legacy_count}  plan={legacy_plan}")
+            print(f"  engine  {engine_time * 1000:8.2f} ms  rows={len(engine_rows)}  plan={plan}")
+            if full_scan(plan):
+                print("  FAIL: engine plan scans the questions table")
+                failures += 1
+        conn.close()
+    return failures
+
+if __name__ == "__main__":
+    sys.exit(1 if main(*(int(a) for a in sys.argv[1:])) else 0)
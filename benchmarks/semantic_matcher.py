@@ -0,0 +1,81 @@
+"""
+Compares the offline TopicMatcher with the Gemini path of SearchBar: latency, and how far their categories agree.
+
+Run from the repository root:  python -m benchmarks.semantic_matcher
+With GOOGLE_API_TOKEN_QUESTION set the LLM is called live; otherwise answers
+already in search_cache.db are used as the reference, and queries without one
+are timed but not scored.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+
+QUERIES = [
+    "number theory", "modular arithmetic and gcd", "automata", "regular expressions", "turing machines",
+    "sql joins", "database normalisation", "entity relationship diagrams", "boolean logic", "karnaugh maps",
+    "flip flops", "shortest paths", "minimum spanning tree", "heaps", "sorting", "hashing",
+    "lazy evaluation", "higher order functions", "induction proofs", "relations and functions",
+    "set theory", "recurrences", "amortised cost", "huffman codes",
+]
+
+def jaccard(a: list[str], b: list[str]) -> float:
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+def percentile(samples: list[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+def main() -> int:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Work on copies, so snapshots and indexes built here don't touch the repo's files
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("questions.db", "search_cache.db"):
+            if os.path.exists(os.path.join(root, name)):
+                shutil.copy(os.path.join(root, name), tmp)
+        os.chdir(tmp)
+        from main import Filter, SearchBar
+
+        search_filter = Filter()
+        t0 = time.perf_counter()
+        os.environ["QUESTION_SEARCH_MODE"] = "offline"
+        offline = SearchBar(search_filter)
+        os.environ.pop("QUESTION_SEARCH_MODE")
+        print(f"offline matcher built in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        llm = SearchBar(search_filter) if os.environ.get("GOOGLE_API_TOKEN_QUESTION") else None
+
+        offline_times, llm_times, scores = [], [], []
+        for query in QUERIES:
+            t0 = time.perf_counter()
+            mine = offline.matcher.match(query)
+            offline_times.append(time.perf_counter() - t0)
+
+            if llm is not None:
+                t0 = time.perf_counter()
+                reference, _ = llm._search_llm(query)
+                llm_times.append(time.perf_counter() - t0)
+            else:
+                reference = offline.cache.get(query, offline.vocabulary_fingerprint)
+
+            line = f"{query!r:34} offline={mine}"
+            if reference is not None:
+                scores.append(jaccard(mine, reference))
+                line += f"\n{'':34} llm    ={reference}  agreement={scores[-1]:.2f}"
+            print(line)
+        os.chdir(root)
+
+    print(f"\noffline  p50 {percentile(offline_times, 0.5) * 1e3:7.3f} ms  p95 {percentile(offline_times, 0.95) * 1e3:7.3f} ms")
+    if llm_times:
+        print(f"llm      p50 {percentile(llm_times, 0.5) * 1e3:7.1f} ms  p95 {percentile(llm_times, 0.95) * 1e3:7.1f} ms")
+    if scores:
+        print(f"agreement (Jaccard) mean {statistics.mean(scores):.2f} over {len(scores)} queries with an LLM answer")
+    else:
+        print("no LLM reference answers available; set GOOGLE_API_TOKEN_QUESTION to score agreement")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Local stand-ins for the two network dependencies: the past paper host and Gemini.
+
+PdfServer serves synthetic PDFs over HTTP with configurable latency, and its
+session() sends the app's real cl.cam.ac.uk URLs to it, so PdfCache, the
+export path and ingestion run unmodified. FakeGemini answers both client
+APIs the app uses (google.genai for ingestion, google.generativeai for
+search) after a configurable delay, failing or throttling at given rates.
+"""
+import json
+import time
+import random
+import hashlib
+import threading
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pdfCache import make_session
+from benchmarks.synthetic import make_pdf, topics
+
+if TYPE_CHECKING:
+    import requests
+
+ORIGIN = "https://www.cl.cam.ac.uk/"
+
+class PdfServer:
+    """
+    Threaded HTTP server on localhost answering /teaching/exams/pastpapers/<id>.pdf.
+
+    Every response waits latency seconds (plus up to jitter more), and a
+    fraction error_rate of them are 503s, which the app's session retries.
+    ETags are honoured, so revalidation returns 304 as the real host does.
+    Use as a context manager; requests counts the GETs served.
+    """
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0,
+                 pages: int = 2, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.pages = pages
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pdfs = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self._httpd.server_port}/"
+
+    def pdf(self, question_id: str) -> bytes:
+        with self._lock:
+            if question_id not in self._pdfs:
+                self._pdfs[question_id] = make_pdf(question_id, self.pages)
+            return self._pdfs[question_id]
+
+    def _serve(self, request: BaseHTTPRequestHandler):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._rng.random() * self.jitter
+            failed = self._rng.random() < self.error_rate
+        time.sleep(delay)
+        name = request.path.rsplit("/", 1)[-1]
+        if not request.path.startswith("/teaching/exams/pastpapers/") or not name.endswith(".pdf"):
+            request.send_error(404)
+            return
+        if failed:
+            request.send_error(503)
+            return
+        body = self.pdf(name[:-4])
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if request.headers.get("If-None-Match") == etag:
+            request.send_response(304)
+            request.send_header("ETag", etag)
+            request.end_headers()
+            return
+        request.send_response(200)
+        request.send_header("Content-Type", "application/pdf")
+        request.send_header("Content-Length", str(len(body)))
+        request.send_header("ETag", etag)
+        request.end_headers()
+        request.wfile.write(body)
+
+    def session(self) -> "requests.Session":
+        """The app's retrying session, with every request for the real host sent here instead."""
+        from requests.adapters import HTTPAdapter
+
+        base, origin = self.base, ORIGIN
+
+        class RedirectAdapter(HTTPAdapter):
+            def send(self, request, **kwargs):
+                request.url = base + request.url[len(origin):]
+                return super().send(request, **kwargs)
+
+        session = make_session()
+        retries = session.get_adapter(origin).max_retries
+        session.mount(origin, RedirectAdapter(pool_connections=8, pool_maxsize=8, max_retries=retries))
+        return session
+
+    def __enter__(self) -> "PdfServer":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+class FakeApiError(Exception):
+    """Shaped like the client libraries' API errors: carries an HTTP status in code."""
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+class FakeGemini:
+    """
+    Deterministic Gemini replacement with configurable latency and failure rates.
+
+    Each call sleeps latency seconds (plus up to jitter more), then raises a
+    500 with probability error_rate or a 429 with probability throttle_rate,
+    which the shared rate limiter treats as throttling. Otherwise classification
+    answers with a synthetic topic (a JSON object of them for batched requests),
+    and search answers with a Python list of the vocabulary names sharing a word
+    with the query, as the real model is prompted to. calls counts requests.
+    """
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, vocabulary: list[str] = None, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.vocabulary = vocabulary or topics()
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _request(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.random() * self.jitter
+            roll = self._rng.random()
+        time.sleep(delay)
+        if roll < self.error_rate:
+            raise FakeApiError(500, "INTERNAL")
+        if roll < self.error_rate + self.throttle_rate:
+            raise FakeApiError(429, "RESOURCE_EXHAUSTED")
+
+    def _topic(self, key: str) -> str:
+        return random.Random(key).choice(self.vocabulary)
+
+    def client(self) -> SimpleNamespace:
+        """Stands in for google.genai.Client, as used by storeData."""
+        def upload(file, config=None):
+            return SimpleNamespace(name=str(file))
+
+        def generate_content(model, contents, config=None):
+            self._request()
+            ids = [part.split()[1].rstrip(":") for part in contents
+                   if isinstance(part, str) and part.startswith("Question ")]
+            if ids:
+                return SimpleNamespace(text=json.dumps({id: self._topic(id) for id in ids}))
+            return SimpleNamespace(text=self._topic(contents[0].name))
+
+        return SimpleNamespace(
+            files=SimpleNamespace(upload=upload, delete=lambda name: None),
+            models=SimpleNamespace(generate_content=generate_content),
+        )
+
+    def model(self) -> SimpleNamespace:
+        """Stands in for google.generativeai.GenerativeModel, as used by SearchBar."""
+        def generate_content(message):
+            self._request()
+            asked = set(message.lower().split())
+            return SimpleNamespace(text=repr([name for name in self.vocabulary if asked & set(name.lower().split())]))
+
+        return SimpleNamespace(generate_content=generate_content)
@@ -0,0 +1,77 @@
+"""
+Guards cold-start cost: importing main must stay cheap and must not pull in the heavy clients.
+
+Run from the repository root:  python -m benchmarks.startup [import_budget_ms] [init_budget_ms]
+Exits non-zero when a budget is exceeded or a deferred dependency is imported eagerly.
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+
+HEAVY_MODULES = ["google.generativeai", "PyPDF2", "requests"]
+
+# Runs in a fresh interpreter so nothing is already imported or cached
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+imported = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+search_filter = main.Filter()
+main.SearchBar(search_filter)
+main.QueryEngine()
+initialised = time.perf_counter() - t0
+
+print(json.dumps({
+    "import_ms": imported * 1000,
+    "init_ms": initialised * 1000,
+    "eager": [m for m in %r if m in sys.modules],
+}))
+"""
+
+def measure(runs: int = 5) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, GOOGLE_API_TOKEN_QUESTION="", PYTHONPATH=root)
+    samples = []
+    # Work on a copy so the snapshot, caches and indexes created on first run don't touch the repo's database
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(os.path.join(root, "questions.db"), tmp)
+        for _ in range(runs):
+            out = subprocess.run(
+                [sys.executable, "-c", PROBE % HEAVY_MODULES],
+                capture_output=True, text=True, env=env, cwd=tmp, check=True
+            ).stdout
+            samples.append(json.loads(out.strip().splitlines()[-1]))
+    # The first run builds the snapshot and indexes; later runs show the warm start
+    return {
+        "import_ms": min(s["import_ms"] for s in samples),
+        "cold_init_ms": samples[0]["init_ms"],
+        "init_ms": min(s["init_ms"] for s in samples),
+        "eager": samples[0]["eager"],
+    }
+
+def main(import_budget_ms: float = 250, init_budget_ms: float = 2000) -> int:
+    result = measure()
+    print(f"import main:           {result['import_ms']:8.1f} ms  (budget {import_budget_ms:.0f} ms)")
+    print(f"first background init: {result['cold_init_ms']:8.1f} ms")
+    print(f"background init:       {result['init_ms']:8.1f} ms  (budget {init_budget_ms:.0f} ms)")
+    print(f"eagerly imported:      {', '.join(result['eager']) or 'none'}")
+
+    failures = 0
+    if result["import_ms"] > import_budget_ms:
+        print("FAIL: importing main exceeded its budget")
+        failures += 1
+    if result["init_ms"] > init_budget_ms:
+        print("FAIL: backend initialisation exceeded its budget")
+        failures += 1
+    if result["eager"]:
+        print("FAIL: heavy dependencies are imported at module load")
+        failures += 1
+    return failures
+
+if __name__ == "__main__":
+    sys.exit(1 if main(*(float(a) for a in sys.argv[1:])) else 0)
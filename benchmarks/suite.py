@@ -0,0 +1,363 @@
+"""
+End-to-end benchmarks of the hot paths against local stand-ins for the PDF host and Gemini.
+
+Run from the repository root:  python -m benchmarks.suite [ingestion search render merge] [--save-baseline]
+Each run is written to benchmarks/results/latest.json and appended to
+history.jsonl. When baseline.json exists (saved from an earlier run with
+--save-baseline), every timing more than --tolerance worse than it is reported
+as a regression and the exit status is non-zero. Runs whose parameters differ
+from the baseline's are not compared.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+import tracemalloc
+from types import SimpleNamespace
+
+# The fake answers as fast as it is configured to, so the limiter's real-quota defaults would only add waiting
+os.environ.setdefault("GEMINI_RATE", "50")
+os.environ.setdefault("GEMINI_BURST", "50")
+os.environ.setdefault("QUESTION_TRACE", "off")
+os.environ.setdefault("GEMINI_LIMITER", "off")
+
+from tracing import tracer, percentile
+from benchmarks.standins import PdfServer, FakeGemini
+from benchmarks.synthetic import make_database, make_manifest, question_ids
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS = os.path.join(ROOT, "benchmarks", "results")
+SCENARIOS = ["ingestion", "search", "render", "merge"]
+
+# Free text the parser can't resolve, alone or beside years, papers and difficulties, so every query
+# leaves a distinct remainder for the LLM
+SEARCH_QUERIES = [
+    "shortest paths", "2020 collision resolution", "hard questions on balanced search", "paper 2 memoisation",
+    "state machines and pattern matching", "anything on joins and indexes", "2019 2020 2021 packet routing",
+    "question 5 beta reduction", "easy encryption", "meaning of programs", "garbage collection paper 3",
+    "undecidable problems", "expected value 2010", "polymorphic unification", "deadlock hard",
+    "rounding error",
+]
+
+def ms(samples: list[float], q: float) -> float:
+    return round(percentile(samples, q) * 1000, 3)
+
+def span_metrics(*names: str) -> dict:
+    """p50/p95 of the app's own spans recorded during the scenario."""
+    summary = tracer.summary()
+    metrics = {}
+    for name in names:
+        if name in summary:
+            key = name.replace(".", "_")
+            metrics[f"span_{key}_p50_ms"] = round(summary[name]["p50"] * 1000, 3)
+            metrics[f"span_{key}_p95_ms"] = round(summary[name]["p95"] * 1000, 3)
+    return metrics
+
+def ingestion(args) -> dict:
+    """storeData ingestion of a manifest: questions per minute through download, classify and store."""
+    import storeData
+    from pdfCache import PdfCache
+    from ingestJournal import IngestJournal
+
+    fake = FakeGemini(args.llm_latency, args.llm_jitter, args.error_rate, args.throttle_rate)
+    with PdfServer(args.pdf_latency, args.pdf_jitter, pages=args.pages) as server:
+        storeData.pdfCache = PdfCache(".pdf_cache", session=server.session())
+        storeData.getClient = fake.client
+        storeData.createTable()
+        manifest = make_manifest("manifest.csv", args.questions)
+        # Short backoff, so retries of injected failures finish within the run
+        journal = IngestJournal("ingest_journal.db", backoff=0.05, max_backoff=0.5)
+        t0 = time.perf_counter()
+        storeData.ingestManifest(manifest, args.workers, 25, args.classify_batch, journal=journal)
+        elapsed = time.perf_counter() - t0
+
+    conn = sqlite3.connect("questions.db")
+    stored = conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+    conn.close()
+    return {
+        "params": {"questions": args.questions, "workers": args.workers, "classify_batch": args.classify_batch,
+                   "pdf_latency": args.pdf_latency, "llm_latency": args.llm_latency,
+                   "error_rate": args.error_rate, "throttle_rate": args.throttle_rate},
+        "metrics": {
+            "questions_per_min": round(stored / elapsed * 60, 1),
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "stored": stored,
+            "gemini_calls": fake.calls,
+            "pdf_requests": server.requests,
+            **span_metrics("download", "llm", "db.store"),
+        },
+    }
+
+def search(args) -> dict:
+    """SearchBar.search followed by get_questions_by_categories and the count, on a large synthetic database."""
+    make_database("questions.db", args.rows)
+    from main import Filter, SearchBar, PastPaperApp
+    from queryEngine import QueryEngine
+
+    search_filter = Filter()
+    engine = QueryEngine()
+    app = SimpleNamespace(query_engine=engine) # All get_questions_by_categories needs of the app
+    fake = FakeGemini(args.llm_latency, args.llm_jitter, args.error_rate, args.throttle_rate,
+                      vocabulary=search_filter.topics + search_filter.modules)
+
+    def run(bar, query: str, first_only: bool = False) -> float:
+        t0 = time.perf_counter()
+        categories = next(bar.search_stages(query)) if first_only else bar.search(query)
+        rows, _ = PastPaperApp.get_questions_by_categories(app, categories)
+        if rows:
+            engine.count(categories)
+        return time.perf_counter() - t0
+
+    saved = {key: os.environ.get(key) for key in ("GOOGLE_API_TOKEN_QUESTION", "QUESTION_SEARCH_MODE")}
+    try:
+        os.environ["GOOGLE_API_TOKEN_QUESTION"] = "benchmark"
+        os.environ.pop("QUESTION_SEARCH_MODE", None)
+        bar = SearchBar(search_filter)
+        bar.model = fake.model()
+        os.environ["QUESTION_SEARCH_MODE"] = "offline"
+        offline = SearchBar(search_filter)
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    tracer.reset()
+    first = [run(bar, query, first_only=True) for query in SEARCH_QUERIES]
+    calls = fake.calls
+    cold = [run(bar, query) for query in SEARCH_QUERIES]    # Every query new to the answer cache
+    cold_calls = fake.calls - calls
+    warm = [run(bar, query) for query in SEARCH_QUERIES]    # Answered from the cache
+    if not args.error_rate and not args.throttle_rate:
+        # Failed calls aren't cached and throttled ones are retried, so only a clean run makes one call per query
+        assert cold_calls == len(SEARCH_QUERIES), f"{cold_calls} LLM calls for {len(SEARCH_QUERIES)} cold queries"
+        assert fake.calls == calls + cold_calls, "cached queries called the LLM"
+    offline_times = [run(offline, query) for query in SEARCH_QUERIES]
+    return {
+        "params": {"rows": args.rows, "queries": len(SEARCH_QUERIES), "llm_latency": args.llm_latency,
+                   "error_rate": args.error_rate, "throttle_rate": args.throttle_rate},
+        "metrics": {
+            "first_page_p50_ms": ms(first, 0.5), "first_page_p95_ms": ms(first, 0.95),
+            "llm_cold_p50_ms": ms(cold, 0.5), "llm_cold_p95_ms": ms(cold, 0.95),
+            "llm_cached_p50_ms": ms(warm, 0.5), "llm_cached_p95_ms": ms(warm, 0.95),
+            "offline_p50_ms": ms(offline_times, 0.5), "offline_p95_ms": ms(offline_times, 0.95),
+            "llm_cold_calls": cold_calls,
+            **span_metrics("db.page", "links", "llm", "matcher"),
+        },
+    }
+
+def render(args) -> dict:
+    """display_results on a full page and a large result list, plus scrolling; needs a display."""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {"skipped": f"no display ({e})"}
+    from main import PastPaperApp, PAGE_SIZE
+    from pdfCache import getLink
+    from queryEngine import FIELDS
+    from resultsView import VirtualResultList
+
+    make_database("questions.db", args.render_rows)
+    conn = sqlite3.connect("questions.db")
+    rows = [row + (getLink(int(row[1]), row[2], row[3]),)
+            for row in conn.execute(f"SELECT {', '.join(FIELDS)} FROM questions")]
+    conn.close()
+
+    root.geometry("900x600")
+    view = VirtualResultList(root, set(), lambda id: None)
+    view.pack(fill="both", expand=True)
+    root.update()
+    # What display_results touches on the app
+    app = SimpleNamespace(results_view=view, current_results=[])
+
+    def show(results: list) -> float:
+        t0 = time.perf_counter()
+        app.current_results = results
+        PastPaperApp.display_results(app)
+        root.update() # Until the idle render has drawn the rows
+        return time.perf_counter() - t0
+
+    page = [show(rows[:PAGE_SIZE]) for _ in range(args.repeat)]
+    full = [show(rows) for _ in range(args.repeat)]
+    scroll = []
+    for step in range(args.repeat * 5):
+        t0 = time.perf_counter()
+        view.canvas.yview_moveto((step * 0.37) % 1)
+        root.update()
+        scroll.append(time.perf_counter() - t0)
+    root.destroy()
+    return {
+        "params": {"rows": len(rows), "page": PAGE_SIZE, "repeat": args.repeat},
+        "metrics": {
+            "page_p50_ms": ms(page, 0.5), "page_p95_ms": ms(page, 0.95),
+            "all_rows_p50_ms": ms(full, 0.5), "all_rows_p95_ms": ms(full, 0.95),
+            "scroll_p50_ms": ms(scroll, 0.5), "scroll_p95_ms": ms(scroll, 0.95),
+            **span_metrics("render"),
+        },
+    }
+
+def merge(args) -> dict:
+    """merge_pdfs time and peak Python memory: over the network, from the cache, in memory, and from the archive."""
+    from main import ExportFiles, EXPORT_MEMORY_LIMIT
+    from pdfCache import PdfCache, PASTPAPER_URL
+    from pdfArchive import PdfArchive
+
+    ids = question_ids(args.merge_count)
+    urls = [PASTPAPER_URL.format(id) for id in ids]
+    metrics = {}
+
+    def timed(name: str, export: ExportFiles, memory_limit):
+        with contextlib.redirect_stdout(io.StringIO()): # PdfMerger logs every file it appends
+            best = float("inf")
+            for _ in range(3): # Best of three, as single merges of small files are noisy
+                t0 = time.perf_counter()
+                export.merge_pdfs(urls, f"{name}.pdf", memory_limit=memory_limit)
+                best = min(best, time.perf_counter() - t0)
+            metrics[f"{name}_ms"] = round(best * 1000, 1)
+            # Measured again separately, as tracing allocations slows the merge down
+            tracemalloc.start()
+            export.merge_pdfs(urls, f"{name}.pdf", memory_limit=memory_limit)
+            metrics[f"{name}_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+            tracemalloc.stop()
+
+    with PdfServer(args.pdf_latency, args.pdf_jitter, pages=args.pages) as server:
+        cache = PdfCache("merge_cache", session=server.session())
+        export = ExportFiles(os.getcwd(), cache=cache)
+        export.archive = None
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            export.merge_pdfs(urls, "network.pdf", memory_limit=EXPORT_MEMORY_LIMIT)
+        metrics["network_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        timed("cached_streaming", export, EXPORT_MEMORY_LIMIT)
+        timed("cached_pdfmerger", export, None)
+
+        archive = PdfArchive("merge.pack")
+        archive.add([(id, cache.get(id, url)) for id, url in zip(ids, urls)])
+        export.archive = archive
+        timed("archive_streaming", export, EXPORT_MEMORY_LIMIT)
+        archive.close()
+        metrics["output_mb"] = round(os.path.getsize("archive_streaming.pdf") / 2 ** 20, 2)
+        metrics["pdf_requests"] = server.requests
+    return {
+        "params": {"files": args.merge_count, "pages": args.pages, "pdf_latency": args.pdf_latency,
+                   "memory_limit": EXPORT_MEMORY_LIMIT},
+        "metrics": metrics,
+    }
+
+def lower_is_better(metric: str) -> bool | None:
+    if metric.endswith(("_ms", "_mb")):
+        return True
+    if metric.endswith("_per_min"):
+        return False
+    return None # Counts and the like are reported, not judged
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before or "metrics" not in before or "metrics" not in result:
+            continue
+        if before["params"] != result["params"]:
+            print(f"{name}: parameters differ from the baseline, not compared")
+            continue
+        print(f"\n{name} vs baseline ({baseline['meta'].get('commit') or 'unknown commit'})")
+        for metric, value in result["metrics"].items():
+            old = before["metrics"].get(metric)
+            direction = lower_is_better(metric)
+            if old is None or direction is None or not old:
+                continue
+            change = (value - old) / old
+            worse = change > tolerance if direction else -change > tolerance
+            flag = "  REGRESSION" if worse else ""
+            print(f"  {metric:<28} {old:>12} -> {value:<12} {change:+7.1%}{flag}")
+            if worse:
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the app's hot paths against local stand-ins")
+    parser.add_argument("scenarios", nargs="*", help=f"Any of {', '.join(SCENARIOS)}; all of them by default")
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic questions for the search scenario")
+    parser.add_argument("--render-rows", type=int, default=10_000, help="Synthetic questions for the render scenario")
+    parser.add_argument("--questions", type=int, default=200, help="Manifest size for the ingestion scenario")
+    parser.add_argument("--merge-count", type=int, default=60, help="PDFs merged by the merge scenario")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per synthetic PDF")
+    parser.add_argument("--workers", type=int, default=4, help="Ingestion worker threads per stage")
+    parser.add_argument("--classify-batch", type=int, default=1, help="Questions per Gemini request during ingestion")
+    parser.add_argument("--pdf-latency", type=float, default=0.05, help="Seconds the PDF server waits per request")
+    parser.add_argument("--pdf-jitter", type=float, default=0.0, help="Extra random PDF server delay, up to this many seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds the fake Gemini waits per call")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="Extra random Gemini delay, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of Gemini calls failing with a 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of Gemini calls throttled with a 429")
+    parser.add_argument("--repeat", type=int, default=10, help="Repetitions of each render measurement")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Slowdown against the baseline that counts as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Make this run the baseline for later comparisons")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own output while scenarios run")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {
+        "meta": {"commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "python": platform.python_version(), "platform": platform.platform()},
+        "scenarios": {},
+    }
+    # Every scenario works in its own scratch directory, as the app reads and writes files beside questions.db
+    with tempfile.TemporaryDirectory() as workspace:
+        for name in args.scenarios or SCENARIOS:
+            os.makedirs(os.path.join(workspace, name))
+            os.chdir(os.path.join(workspace, name))
+            tracer.reset()
+            print(f"Running {name}...", flush=True)
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            try:
+                with output:
+                    result = globals()[name](args)
+            finally:
+                os.chdir(ROOT)
+            results["scenarios"][name] = result
+            if "skipped" in result:
+                print(f"  skipped: {result['skipped']}")
+                continue
+            for metric, value in result["metrics"].items():
+                print(f"  {metric:<28} {value}")
+
+    os.makedirs(RESULTS, exist_ok=True)
+    with open(os.path.join(RESULTS, "latest.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    with open(os.path.join(RESULTS, "history.jsonl"), "a") as f:
+        f.write(json.dumps(results) + "\n")
+
+    baseline_path = os.path.join(RESULTS, "baseline.json")
+    regressions = []
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+    if args.save_baseline:
+        shutil.copy(os.path.join(RESULTS, "latest.json"), baseline_path)
+        print(f"\nSaved as the baseline in {baseline_path}")
+    if regressions:
+        print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
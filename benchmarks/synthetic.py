@@ -0,0 +1,118 @@
+"""
+Generates synthetic questions.db files, past paper PDFs and ingestion manifests for benchmarking.
+
+Write a large database from the repository root:  python -m benchmarks.synthetic questions.db [rows]
+"""
+import sys
+import random
+import sqlite3
+import itertools
+
+SUBJECTS = [
+    "Graph", "Hash", "Binary", "Dynamic", "Greedy", "Number", "Modular", "Finite", "Regular", "Turing",
+    "Relational", "Concurrent", "Distributed", "Floating", "Boolean", "Sequential", "Lambda", "Type",
+    "Memory", "Cache", "Network", "Compiler", "Probability", "Linear", "Logic", "Set", "Security",
+]
+KINDS = [
+    "Algorithms", "Tables", "Trees", "Programming", "Theory", "Arithmetic", "Automata", "Languages",
+    "Machines", "Algebra", "Control", "Systems", "Point", "Circuits", "Calculus", "Inference",
+    "Management", "Hierarchies", "Protocols", "Analysis", "Semantics", "Proofs",
+]
+MODULES = [
+    "Algorithms 1", "Algorithms 2", "Discrete Mathematics", "Databases", "Digital Electronics",
+    "Foundations of CS", "Operating Systems", "Compiler Construction", "Computer Networking",
+    "Logic and Proof", "Semantics of Programming Languages", "Concurrent and Distributed Systems",
+    "Security", "Computation Theory", "Complexity Theory", "Machine Learning", "Graphics",
+    "Computer Architecture", "Programming in C", "Further Java",
+]
+DIFFICULTIES = ["Easy", "Medium", "Hard", "None"]
+
+def topics() -> list[str]:
+    return [f"{subject} {kind}" for subject, kind in itertools.product(SUBJECTS, KINDS)]
+
+def make_database(path: str, n: int = 100_000, seed: int = 0) -> str:
+    """Writes n random questions to a fresh questions table at path and returns the path."""
+    rng = random.Random(seed)
+    names = topics()
+    combos = list(itertools.product(range(1993, 2026), range(1, 21), range(1, 161)))
+    rng.shuffle(combos)
+
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE IF EXISTS questions")
+    conn.execute("""
+        CREATE TABLE questions (
+            QuestionID TEXT PRIMARY KEY,
+            Year TEXT,
+            Paper TEXT,
+            QuestionNumber TEXT,
+            Topics TEXT,
+            Module TEXT,
+            Difficulty TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            (f"y{year}p{paper}q{question}", str(year), f"Paper {paper}", f"Question {question}",
+             rng.choice(names), rng.choice(MODULES), rng.choice(DIFFICULTIES))
+            for year, paper, question in combos[:n]
+        )
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+def make_pdf(question_id: str, pages: int = 2, lines: int = 40) -> bytes:
+    """
+    A small valid PDF standing in for one question: pages of Helvetica text about a few synthetic topics.
+
+    The text is seeded by the question id, so the same id always gives the
+    same bytes (and the same ETag from the stand-in server), and it is real
+    text, so text extraction and the full-text index have something to index.
+    """
+    rng = random.Random(question_id)
+    words = " ".join(topics()).lower().split()
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        text = [f"BT /F1 11 Tf 60 780 Td 14 TL ({question_id} page {page + 1}) Tj"]
+        text += [f"T* ({' '.join(rng.choices(words, k=10))}) Tj" for _ in range(lines)]
+        stream = "\n".join(text + ["ET"]).encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def question_ids(n: int, seed: int = 0) -> list[str]:
+    """n distinct ids in the yYYYYpPqQ form storeData.extractData parses."""
+    rng = random.Random(seed)
+    combos = list(itertools.product(range(1993, 2026), range(1, 10), range(1, 13)))
+    rng.shuffle(combos)
+    return [f"y{year}p{paper}q{question}" for year, paper, question in combos[:n]]
+
+def make_manifest(path: str, n: int = 200, seed: int = 0) -> str:
+    """Writes an ingestion manifest (id, median, module) of n questions to path and returns the path."""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write("id,median,module\n")
+        for id in question_ids(n, seed):
+            f.write(f"{id},{rng.randint(-1, 20)},{rng.choice(MODULES)}\n")
+    return path
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "synthetic_questions.db"
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    make_database(target, rows)
+    print(f"Wrote {rows} synthetic questions to {target}")
@@ -0,0 +1,51 @@
+import tkinter as tk
+from tkinter import ttk
+
+from tracing import tracer
+from rateLimiter import gemini
+
+class DebugPanel(tk.Toplevel):
+    """
+    Live table of the traced stages: how many ran and their recent p50/p95/max/last times.
+
+    Refreshes itself every interval_ms from the in-process tracer, with the
+    Gemini limiter's queue and concurrency underneath, until it is closed.
+    """
+    COLUMNS = ("count", "p50", "p95", "max", "last")
+
+    def __init__(self, master, interval_ms: int = 1000):
+        super().__init__(master)
+        self.title("Timings")
+        self.geometry("520x320")
+        self.interval_ms = interval_ms
+
+        self.table = ttk.Treeview(self, columns=self.COLUMNS, show="tree headings")
+        self.table.heading("#0", text="span")
+        self.table.column("#0", width=150)
+        for column in self.COLUMNS:
+            self.table.heading(column, text=column if column == "count" else f"{column} ms")
+            self.table.column(column, width=70, anchor="e")
+        self.table.pack(fill="both", expand=True, padx=5, pady=5)
+        self.limiter = ttk.Label(self, anchor="w")
+        self.limiter.pack(fill="x", padx=5, pady=(0, 5))
+
+        self._refresh_id = None
+        self._refresh()
+
+    def _refresh(self):
+        for name, stats in tracer.summary().items():
+            values = [stats["count"] if not stats["errors"] else f"{stats['count']} ({stats['errors']} failed)"]
+            values += [f"{stats[key] * 1e3:.1f}" for key in self.COLUMNS[1:]]
+            if self.table.exists(name):
+                self.table.item(name, values=values)
+            else:
+                self.table.insert("", "end", iid=name, text=name, values=values)
+        limiter = gemini.metrics()
+        self.limiter.config(text=f"Gemini: {limiter['active']} active of {limiter['concurrency_limit']}, "
+                                 f"{limiter['queue_depth']} queued, {limiter['throttled']} throttled")
+        self._refresh_id = self.after(self.interval_ms, self._refresh)
+
+    def destroy(self):
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+        super().destroy()
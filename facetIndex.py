@@ -0,0 +1,216 @@
+import re
+import sqlite3
+import threading
+
+import textIndex
+from queryEngine import FIELDS, WEIGHTS, classify, fts_phrase
+
+TEXT_COLUMNS = ("Topics", "Module")
+BITMAP_FIELDS = [field for field in FIELDS if field != "QuestionID"]
+
+# Set bit positions of every byte value, for walking a bitmap a byte at a time
+BYTE_BITS = [tuple(i for i in range(8) if b >> i & 1) for b in range(256)]
+
+def tokens(text: str) -> tuple[str, ...]:
+    # Close to FTS5's unicode61 tokenizer, so text matches agree with QueryEngine
+    return tuple(re.findall(r"\w+", text.lower()))
+
+def contains_phrase(haystack: tuple, needle: tuple) -> bool:
+    n = len(needle)
+    return n > 0 and any(haystack[i:i + n] == needle for i in range(len(haystack) - n + 1))
+
+def bit_positions(bits: int) -> list[int]:
+    """Returns the indexes of the set bits of a bitmap, lowest first."""
+    positions = []
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        if byte:
+            base = offset * 8
+            positions.extend(base + i for i in BYTE_BITS[byte])
+    return positions
+
+def bitmap_of(slots: list[int]) -> int:
+    """Builds a bitmap with the given bits set, via a byte buffer rather than one shift per bit."""
+    buffer = bytearray(max(slots) // 8 + 1)
+    for slot in slots:
+        buffer[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buffer, "little")
+
+class FacetIndex:
+    """
+    In-memory alternative to QueryEngine for the whole questions table.
+
+    Rows are held as one list per column, addressed by slot, and every distinct
+    value of every facet column has a bitmap (a Python int) of the slots holding it.
+    A search ORs the bitmaps of the values within a facet and ANDs the facets,
+    so it is a handful of word-parallel integer operations instead of a
+    database round-trip. Before each search PRAGMA data_version is checked on a
+    long-lived connection; if another connection has committed, only rows
+    whose rowid appeared or disappeared are loaded or cleared. That covers
+    storeData's INSERT OR REPLACE; call rebuild() after in-place UPDATEs.
+    Matches on question text are looked up in the textIndex FTS table.
+    """
+    def __init__(self, db_path: str = "questions.db"):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        textIndex.ensure_schema(self._conn)
+        self._lock = threading.Lock()
+        self.rebuild()
+
+    def rebuild(self):
+        with self._lock:
+            self.columns = {field: [] for field in FIELDS}
+            self.rowids = []     # slot -> rowid, the final tiebreak when ranking
+            self.bitmaps = {field: {} for field in BITMAP_FIELDS}
+            self.by_id = {}      # QuestionID -> slot; ids are unique, so a bitmap each would be waste
+            self.slots = {}      # rowid -> slot
+            self.live = 0        # bitmap of slots holding a current row
+            self._text_cache = {}
+            self._data_version = None
+            self._refresh()
+
+    def _refresh(self) -> bool:
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return False
+        self._data_version = version
+
+        # Fast path for pure appends: everything new sits above the highest known rowid
+        newest = max(self.slots, default=0)
+        added = [rowid for (rowid,) in self._conn.execute("SELECT rowid FROM questions WHERE rowid > ?", (newest,))]
+        count = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        if count != len(self.slots) + len(added):
+            current = {rowid for (rowid,) in self._conn.execute("SELECT rowid FROM questions")}
+            for rowid in set(self.slots) - current:
+                self._remove(self.slots.pop(rowid))
+            added = sorted(current - set(self.slots))
+
+        if added:
+            self._add(self._fetch(added))
+        self._text_cache.clear()
+        return True
+
+    def _fetch(self, rowids: list[int]):
+        for start in range(0, len(rowids), 500):
+            chunk = rowids[start:start + 500]
+            yield from self._conn.execute(
+                f"SELECT rowid, {', '.join(FIELDS)} FROM questions WHERE rowid IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+
+    def _add(self, rows):
+        """Appends rows of (rowid, *FIELDS), then ORs each value's new slots into its bitmap in one step."""
+        first = len(self.columns[FIELDS[0]])
+        new_slots = {field: {} for field in BITMAP_FIELDS}
+        for rowid, *values in rows:
+            slot = len(self.columns[FIELDS[0]])
+            self.slots[rowid] = slot
+            self.rowids.append(rowid)
+            for field, value in zip(FIELDS, values):
+                value = str(value) if value is not None else None
+                self.columns[field].append(value)
+                if field == "QuestionID":
+                    self.by_id[value] = slot
+                elif value is not None:
+                    new_slots[field].setdefault(value, []).append(slot)
+
+        last = len(self.columns[FIELDS[0]])
+        self.live |= ((1 << (last - first)) - 1) << first
+        for field, values in new_slots.items():
+            for value, slots in values.items():
+                self.bitmaps[field][value] = self.bitmaps[field].get(value, 0) | bitmap_of(slots)
+
+    def _remove(self, slot: int):
+        bit = 1 << slot
+        del self.by_id[self.columns["QuestionID"][slot]]
+        for field in BITMAP_FIELDS:
+            value = self.columns[field][slot]
+            if value is not None:
+                self.bitmaps[field][value] &= ~bit
+                if not self.bitmaps[field][value]:
+                    del self.bitmaps[field][value]
+        self.live &= ~bit
+
+    def _text_bitmap(self, term: str, fields: tuple = TEXT_COLUMNS) -> int:
+        """Slots whose fields contain term as a token phrase, like an FTS5 phrase query."""
+        key = (term, fields)
+        if key not in self._text_cache:
+            needle, bits = tokens(term), 0
+            for field in fields:
+                for value, value_bits in self.bitmaps[field].items():
+                    if contains_phrase(tokens(value), needle):
+                        bits |= value_bits
+            self._text_cache[key] = bits
+        return self._text_cache[key]
+
+    def _body_ranks(self, text: list[str]) -> dict[int, float]:
+        """BM25 rank, by slot, of every question whose text matches any of the terms."""
+        query = f"SELECT QuestionID, Rank FROM ({textIndex.BODY_MATCH_SQL})"
+        matches = self._conn.execute(query, (" OR ".join(fts_phrase(t) for t in text),))
+        return {self.by_id[id]: rank for id, rank in matches if id in self.by_id}
+
+    def _match(self, categories: list[str]):
+        """Returns the bitmap of matching slots, the facets and text terms, and the body ranks. Call under the lock."""
+        facets, text = classify(categories)
+        if not facets and not text:
+            return 0, facets, text, {}
+        self._refresh()
+        bits = self.live
+        for field, values in facets.items():
+            column_bits = 0
+            for value in values:
+                if field == "QuestionID":
+                    column_bits |= 1 << self.by_id[value] if value in self.by_id else 0
+                else:
+                    column_bits |= self.bitmaps[field].get(value, 0)
+            bits &= column_bits
+        body = {}
+        if text:
+            text_bits = 0
+            for term in text:
+                text_bits |= self._text_bitmap(term)
+            body = self._body_ranks(text)
+            bits &= text_bits | (bitmap_of(list(body)) if body else 0)
+        return bits, facets, text, body
+
+    def _row(self, slot: int) -> tuple:
+        return tuple(self.columns[field][slot] for field in FIELDS)
+
+    def find(self, categories: list[str]) -> list[tuple]:
+        """Returns the rows (in FIELDS order) matching the categories, with QueryEngine's semantics."""
+        with self._lock:
+            bits = self._match(categories)[0]
+            return [self._row(slot) for slot in bit_positions(bits)]
+
+    def count(self, categories: list[str]) -> int:
+        with self._lock:
+            return self._match(categories)[0].bit_count()
+
+    def page(self, categories: list[str], limit: int, after: tuple = None) -> tuple[list[tuple], tuple]:
+        """
+        Returns up to limit matching rows, best first, and the cursor for the next page.
+
+        Scores and cursors are QueryEngine's: a slot gains WEIGHTS["Topics"] for
+        each term found in its Topics, WEIGHTS["Module"] for each in its Module
+        and WEIGHTS["Body"] for a body match, ties broken by BM25 rank and rowid.
+        """
+        with self._lock:
+            bits, facets, text, body = self._match(categories)
+            slots = bit_positions(bits)
+            scores = dict.fromkeys(slots, sum(WEIGHTS[field] for field in facets))
+            for term in text:
+                for field in TEXT_COLUMNS:
+                    for slot in bit_positions(bits & self._text_bitmap(term, (field,))):
+                        scores[slot] += WEIGHTS[field]
+            for slot in body:
+                if slot in scores:
+                    scores[slot] += WEIGHTS["Body"]
+
+            keys = sorted((-scores[slot], body.get(slot, 0), self.rowids[slot], slot) for slot in slots)
+            if after is not None:
+                keys = [key for key in keys if key[:3] > tuple(after)]
+            cursor = keys[limit - 1][:3] if len(keys) > limit else None
+            return [self._row(key[3]) for key in keys[:limit]], cursor
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,145 @@
+import time
+import threading
+from typing import NamedTuple
+
+from storage import connect
+
+class Job(NamedTuple):
+    id: str
+    median: int
+    module: str
+    state: str
+    content_hash: str
+    topic: str
+    attempts: int
+
+class IngestJournal:
+    """
+    Durable record of where every question in an ingestion run has got to.
+
+    Each job advances pending -> downloaded -> classified -> stored, and each
+    step is committed as soon as it happens, so after a crash or Ctrl-C the
+    next run picks every question up from its last completed step. The topic
+    is saved at the classified step, so a paid Gemini answer is never asked
+    for twice. A failed step leaves the job where it was and schedules a retry
+    after an exponentially growing delay; after max_attempts it is left
+    failed until the next enqueue() of the same question.
+    """
+    def __init__(self, path: str = "ingest_journal.db", max_attempts: int = 5,
+                 backoff: float = 10.0, max_backoff: float = 600.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+
+        with connect(self.path) as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    QuestionID TEXT PRIMARY KEY,
+                    Median INTEGER NOT NULL,
+                    Module TEXT NOT NULL,
+                    State TEXT NOT NULL,
+                    ContentHash TEXT,
+                    Topic TEXT,
+                    Attempts INTEGER NOT NULL DEFAULT 0,
+                    NextAttempt REAL NOT NULL DEFAULT 0,
+                    Error TEXT,
+                    Updated REAL NOT NULL
+                )
+            """)
+
+    def enqueue(self, entries: list[tuple[str, int, str]]):
+        """
+        Adds (id, median, module) entries as pending jobs.
+
+        Unfinished jobs already in the journal keep their progress but take the
+        new median and module and get their retries back. Stored jobs go back to
+        pending, so the new values reach the database; an unchanged PDF is still
+        not sent to Gemini again, as ingestion reuses the stored topic.
+        """
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            conn.executemany("""
+                INSERT INTO jobs (QuestionID, Median, Module, State, Updated) VALUES (?, ?, ?, 'pending', ?)
+                ON CONFLICT (QuestionID) DO UPDATE SET
+                    Median = excluded.Median, Module = excluded.Module, Attempts = 0, NextAttempt = 0, Error = NULL,
+                    State = CASE State WHEN 'stored' THEN 'pending' ELSE State END,
+                    Topic = CASE State WHEN 'stored' THEN NULL ELSE Topic END
+            """, [(id, median, module, now) for id, median, module in entries])
+
+    def clear(self):
+        with self._lock, connect(self.path) as conn:
+            conn.execute("DELETE FROM jobs")
+
+    def ready(self) -> list[Job]:
+        """Returns the unfinished jobs that are due, i.e. not waiting on a retry or out of attempts."""
+        with connect(self.path) as conn:
+            rows = conn.execute("""
+                SELECT QuestionID, Median, Module, State, ContentHash, Topic, Attempts FROM jobs
+                WHERE State != 'stored' AND Attempts < ? AND NextAttempt <= ?
+                ORDER BY rowid
+            """, (self.max_attempts, time.time())).fetchall()
+        return [Job(*row) for row in rows]
+
+    def next_retry(self):
+        """Seconds until the earliest scheduled retry, or None if nothing is waiting on one."""
+        with connect(self.path) as conn:
+            (due,) = conn.execute(
+                "SELECT MIN(NextAttempt) FROM jobs WHERE State != 'stored' AND Attempts < ?",
+                (self.max_attempts,)
+            ).fetchone()
+        return None if due is None else max(0.0, due - time.time())
+
+    def _advance(self, id: str, state: str, **columns):
+        assignments = "".join(f", {column} = ?" for column in columns)
+        with self._lock, connect(self.path) as conn:
+            conn.execute(
+                f"UPDATE jobs SET State = ?, Error = NULL, Updated = ?{assignments} WHERE QuestionID = ?",
+                (state, time.time(), *columns.values(), id)
+            )
+
+    def downloaded(self, id: str, content_hash: str):
+        self._advance(id, "downloaded", ContentHash=content_hash)
+
+    def classified(self, id: str, content_hash: str, topic: str):
+        self._advance(id, "classified", ContentHash=content_hash, Topic=topic)
+
+    def stored(self, ids: list[str]):
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            conn.executemany(
+                "UPDATE jobs SET State = 'stored', Error = NULL, Updated = ? WHERE QuestionID = ?",
+                [(now, id) for id in ids]
+            )
+
+    def failed(self, id: str, error: Exception, retry: bool = True) -> float:
+        """
+        Records a failed step and schedules the retry, returning its delay,
+        or None if the job has now been given up on.
+
+        With retry=False (an error that cannot go away, like a malformed id)
+        the job is given up on straight away.
+        """
+        with self._lock, connect(self.path) as conn:
+            (attempts,) = conn.execute("SELECT Attempts FROM jobs WHERE QuestionID = ?", (id,)).fetchone()
+            attempts = attempts + 1 if retry else self.max_attempts
+            delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+            conn.execute(
+                "UPDATE jobs SET Attempts = ?, NextAttempt = ?, Error = ?, Updated = ? WHERE QuestionID = ?",
+                (attempts, time.time() + delay, f"{type(error).__name__}: {error}", time.time(), id)
+            )
+        return delay if attempts < self.max_attempts else None
+
+    def given_up(self) -> list[tuple[str, str]]:
+        """Returns (id, last error) for every job that ran out of attempts."""
+        with connect(self.path) as conn:
+            return conn.execute(
+                "SELECT QuestionID, Error FROM jobs WHERE State != 'stored' AND Attempts >= ? ORDER BY rowid",
+                (self.max_attempts,)
+            ).fetchall()
+
+    def counts(self) -> dict[str, int]:
+        with connect(self.path) as conn:
+            return dict(conn.execute("SELECT State, COUNT(*) FROM jobs GROUP BY State"))
@@ -1,51 +1,77 @@
 import tkinter as tk
 from tkinter import ttk, filedialog
-import sqlite3, os, io, requests, datetime, ast, threading, webbrowser
-import google.generativeai as genai
+import sqlite3, os, datetime, ast, threading, webbrowser, time, hashlib
+from concurrent.futures import ThreadPoolExecutor
 from random import shuffle
-from PyPDF2 import PdfMerger
+# google.generativeai, PyPDF2 and requests are imported where first used, so the window opens quickly
+from searchCache import QueryCache
+from queryParser import QueryParser
+from queryEngine import QueryEngine
+from facetIndex import FacetIndex
+from resultsView import VirtualResultList
+from vocabulary import Vocabulary
+from pdfCache import PdfCache, PASTPAPER_URL, getLink
+from pdfArchive import PdfArchive, ARCHIVE_PATH
+from searchWorker import SearchWorker
+from rateLimiter import gemini, INTERACTIVE
+from tracing import span
+
+pdf_cache = PdfCache()
+# Built with `python pdfArchive.py`; when present, previews and exports read from it instead of the network
+pdf_archive = PdfArchive() if os.path.exists(ARCHIVE_PATH) else None
+EXPORT_MEMORY_LIMIT = 16 * 1024 * 1024 # Bytes of page data held before the streaming merge flushes to disk
+SEARCH_DEBOUNCE_MS = 400 # Pause in typing before a live search starts
+SEARCH_MIN_LENGTH = 3 # Shorter queries only search when Enter or Search is pressed
+PAGE_SIZE = 100 # Results fetched per page; more are loaded as the list is scrolled
 
 class Filter:
     def __init__(self):
-        # Initialize fields by getting unique values from the database
-        self.years = self._getField("Year")
-        self.papers = self._getField("Paper")
-        self.questions = self._getField("QuestionNumber")
-        self.topics = self._getField("Topics")
-        self.modules = self._getField("Module")
-        self.difficulties = self._getField("Difficulty")
-
-    def _getField(self, fieldName: str) -> list[str]:
-        # Field Names: QuestionID, Year, Paper, QuestionNumber, Topics, Module, Difficulty
-        # This is the original getField function, renamed for clarity within the class
-        conn = sqlite3.connect("questions.db")
-        cursor = conn.cursor()
-
-        cursor.execute(f"SELECT DISTINCT {fieldName} FROM questions")
-
-        unique_topics = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        # Convert list items to string, handling potential None/null values gracefully
-        return [str(item) for item in unique_topics if item is not None]
+        # One-pass vocabulary with per-value counts, loaded from a snapshot unless the database changed
+        vocabulary = Vocabulary.load()
+        self.counts = vocabulary.counts
+        self.years = vocabulary.values("Year")
+        self.papers = vocabulary.values("Paper")
+        self.questions = vocabulary.values("QuestionNumber")
+        self.topics = vocabulary.values("Topics")
+        self.modules = vocabulary.values("Module")
+        self.difficulties = vocabulary.values("Difficulty")
+        self._all = None
 
     def shuffleAll(self):
-        # Flattens and shuffles all filter categories for the LLM system prompt
-        l = [item for item in (
-            self.years + self.papers + self.questions +
-            self.topics + self.modules + self.difficulties
-        ) if item]
-        shuffle(l)
-        return list(set(l))
+        # Flattens, dedups and shuffles all filter categories for the LLM system prompt, once per Filter
+        if self._all is None:
+            self._all = list(dict.fromkeys(item for item in (
+                self.years + self.papers + self.questions +
+                self.topics + self.modules + self.difficulties
+            ) if item))
+            shuffle(self._all)
+        return list(self._all)
+
+    def fingerprint(self) -> str:
+        # Stable hash of the vocabulary fed to the LLM, used to invalidate cached searches
+        vocabulary = sorted(self.shuffleAll())
+        return hashlib.sha256("\n".join(vocabulary).encode()).hexdigest()
 
 class SearchBar:
-    def __init__(self, filter_instance: Filter) -> None:
+    def __init__(self, filter_instance: Filter, cache: QueryCache = None) -> None:
+        # Answers are cached per vocabulary, so newly ingested topics invalidate them
+        self.cache = cache or QueryCache()
+        self.vocabulary_fingerprint = filter_instance.fingerprint()
+        self.cache.prune(self.vocabulary_fingerprint)
+        self.parser = QueryParser(filter_instance)
+
+        self.model = None
+        self.matcher = None
         api_key = os.environ.get("GOOGLE_API_TOKEN_QUESTION")
-        if not api_key:
-            # Note: For real-world deployment, you'd handle this more robustly than just an EnvironmentError
-            print("WARNING: Missing GOOGLE_API_TOKEN_QUESTION environment variable. Search functionality will be disabled.")
-            self.model = None
+        # QUESTION_SEARCH_MODE=offline maps free text onto topics locally instead of asking Gemini
+        if os.environ.get("QUESTION_SEARCH_MODE") == "offline" or not api_key:
+            if not api_key:
+                print("WARNING: Missing GOOGLE_API_TOKEN_QUESTION environment variable. Falling back to offline topic matching.")
+            from semanticMatcher import TopicMatcher # Imported here, as NumPy is slow to load
+            self.matcher = TopicMatcher.from_database(filter_instance)
             return
 
+        import google.generativeai as genai
         genai.configure(api_key=api_key)
 
         # Create a detailed system instruction for the model
@@ -88,70 +114,184 @@ class SearchBar:
 
         self.model = genai.GenerativeModel("gemini-2.5-flash", system_instruction=system_instruction)
         
-    def search(self, message: str) -> list[str]:
+    def search(self, message: str) -> "SearchResult":
+        result = SearchResult([], "none")
+        for result in self.search_stages(message):
+            pass
+        return result
+
+    def search_stages(self, message: str):
+        """
+        Yields progressively fuller SearchResults for message.
+
+        Years, papers, questions, difficulties and exact names are resolved
+        locally and yielded straight away, along with any free-text remainder
+        as a term of its own; only that remainder goes to the LLM (or the
+        offline TopicMatcher), and its categories are merged into a second
+        result. A caller that stops iterating after the first result never
+        makes the LLM call.
+        """
+        parsed = self.parser.parse(message)
+        # The remainder itself is searched too, so it can match question text that no topic names
+        local = parsed.categories + ([parsed.residual] if parsed.residual else [])
+        yield SearchResult(local, "local", final=not parsed.residual)
+        if not parsed.residual:
+            return
+
+        if self.matcher is not None:
+            with span("matcher", query=parsed.residual):
+                categories, source = self.matcher.match(parsed.residual), "offline"
+        else:
+            categories, source = self._search_llm(parsed.residual)
+        if parsed.categories:
+            source = f"local+{source}"
+        yield SearchResult(list(dict.fromkeys(local + categories)), source)
+
+    def _search_llm(self, message: str) -> tuple[list[str], str]:
+        cached = self.cache.get(message, self.vocabulary_fingerprint)
+        if cached is not None:
+            return cached, "cache"
         if not self.model:
              print("Search model is not configured. Returning empty list.")
-             return []
+             return [], "none"
+
+        def request():
+            with span("llm", query=message):
+                return self.model.generate_content(message)
+
         try:
-            response = self.model.generate_content(message)
+            # Shared limiter: searches go ahead of any queued ingestion calls and retry when throttled
+            response = gemini.call(request, priority=INTERACTIVE)
             # Use ast.literal_eval for safe evaluation of the list string
             l = ast.literal_eval(response.text.strip())
             if isinstance(l, list):
-                return l
+                l = [str(item) for item in l]
+                self.cache.put(message, self.vocabulary_fingerprint, l)
+                return l, "llm"
             else:
-                return []
+                return [], "llm"
         except Exception as e:
             print(f"Error in LLM search: {e}")
             print(f"LLM Response Text: {response.text if 'response' in locals() else 'N/A'}")
-            return []
+            return [], "none"
+
+class SearchResult(list):
+    """Category list returned by SearchBar.search, tagged with the path that produced it."""
+    def __init__(self, categories: list[str], source: str, final: bool = True):
+        super().__init__(categories)
+        self.source = source # "local", "offline", "cache", "llm", "none", or "local+" one of the latter
+        self.final = final # False for the local-only result yielded ahead of an LLM call
 
 class ExportFiles:
-    def __init__(self, master_path):
+    def __init__(self, master_path, cache: PdfCache = None, archive: PdfArchive = None):
         self.master_path = master_path # Storing the path for writing the merged PDF
+        self.cache = cache or pdf_cache # Shared PDF cache, so repeat exports skip the network
+        self.archive = archive or pdf_archive # Packed local copy, read in place when it holds a question
+
+    def merge_pdfs(self, urls: list[str], filename: str, progress=None, workers: int = 8,
+                   memory_limit: int = None, cancel: threading.Event = None) -> None:
+        """Downloads PDFs from URLs concurrently and merges them, in order, into a single file.
+
+        progress, if given, is called as progress(done, total, bytes_done, eta_seconds)
+        from a worker thread each time a download finishes. With a memory_limit the
+        merge streams pages straight to disk instead of holding every input in a
+        PdfMerger; setting cancel stops the export and raises ExportCancelled.
+        Questions held in the packed archive are read from its memory mapping
+        and never downloaded.
+        """
+        import requests
+        from PyPDF2 import PdfMerger
+        from pdfMerge import merge_files, ExportCancelled, streaming_supported, PYPDF2_VERSION
 
-    def merge_pdfs(self, urls: list[str], filename: str) -> None:
-        """Downloads PDFs from URLs and merges them into a single file."""
         output_filepath = os.path.join(self.master_path, filename)
-        merger = PdfMerger()
-
-        for url in urls:
+        if memory_limit is not None and not streaming_supported():
+            import PyPDF2
+            print(f"Streaming merge needs PyPDF2 {PYPDF2_VERSION} (found {PyPDF2.__version__}), merging in memory")
+            memory_limit = None
+
+        start = time.monotonic()
+        lock = threading.Lock()
+        counters = {"done": 0, "bytes": 0}
+
+        def fetch(url):
+            if cancel is not None and cancel.is_set():
+                return None
+            # The cache key is the question id, which is the file name in the URL
+            qid = os.path.splitext(os.path.basename(url))[0]
+            with span("download", question=qid) as download:
+                try:
+                    if self.archive is not None and qid in self.archive:
+                        path, size = self.archive.open(qid), self.archive.size(qid)
+                        download.set(source="archive")
+                    else:
+                        path = self.cache.path(qid, url)
+                        size = path.stat().st_size
+                        path = str(path)
+                        download.set(source="cache")
+                except requests.exceptions.RequestException as e:
+                    print(f"Error downloading {url}: {e}")
+                    path, size = None, 0
+                    download.fail(e)
+                download.set(bytes=size)
+            if progress:
+                with lock:
+                    counters["done"] += 1
+                    counters["bytes"] += size
+                    done, total_bytes = counters["done"], counters["bytes"]
+                elapsed = time.monotonic() - start
+                progress(done, len(urls), total_bytes, elapsed / done * (len(urls) - done))
+            return path
+
+        # map keeps results in the user's selection order regardless of completion order
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(fetch, urls)) # File paths from the cache, or file objects over the archive
+        if cancel is not None and cancel.is_set():
+            raise ExportCancelled()
+
+        if memory_limit is not None:
+            downloaded = [path for path in paths if path is not None]
+            if not downloaded:
+                print("No valid PDFs were appended to the merger.")
+                return
             try:
-                response = requests.get(url, stream=True)
-                response.raise_for_status()  # Check for bad status codes
-                
-                # Use a BytesIO object to hold the PDF content in memory
-                file_bytes = io.BytesIO(response.content)
-                merger.append(file_bytes)
-                print(f"Successfully appended: {url}")
-            except requests.exceptions.RequestException as e:
-                print(f"Error downloading {url}: {e}")
+                with span("merge.write", files=len(downloaded), streaming=True):
+                    deduplicated = merge_files(downloaded, output_filepath, memory_limit, cancel)
+            finally:
+                for path in downloaded:
+                    if not isinstance(path, str):
+                        path.close()
+            print(f"PDFs merged successfully to: {output_filepath} ({deduplicated} duplicate streams shared)")
+            return
+
+        merger = PdfMerger()
+        for url, path in zip(urls, paths):
+            if path is None:
                 # Decide whether to continue or stop on failure
                 continue
+            merger.append(path)
+            print(f"Successfully appended: {url}")
 
         if merger.inputs:
-            with open(output_filepath, "wb") as f_out:
+            with span("merge.write", files=len(merger.inputs), streaming=False), open(output_filepath, "wb") as f_out:
                 merger.write(f_out)
             merger.close()
             print(f"PDFs merged successfully to: {output_filepath}")
         else:
             print("No valid PDFs were appended to the merger.")
             
-def getLink(yearSat: int, paper: str, question: int) -> str:
-    """Generates the assumed URL for the PDF based on parameters."""
-    paperNumber = extract_trailing_number(paper)
-    questionNumber = extract_trailing_number(question)
-    return f"https://www.cl.cam.ac.uk/teaching/exams/pastpapers/y{yearSat}p{paperNumber}q{questionNumber}.pdf"
-
-def extract_trailing_number(s):
-    # Iterate backwards from the end of the string
-    i = len(s) - 1
-    while i >= 0 and s[i].isdigit():
-        i -= 1
-    # The number starts at position i + 1
-    return s[i+1:]
-
 def open_pdf(id: str):
-    webbrowser.open(f"https://www.cl.cam.ac.uk/teaching/exams/pastpapers/{id}.pdf")
+    """Opens the archived or cached copy of a question's PDF, fetching it off the UI thread."""
+    def _open():
+        try:
+            if pdf_archive is not None and id in pdf_archive:
+                path = pdf_archive.extract(id)
+            else:
+                path = pdf_cache.path(id)
+            webbrowser.open(path.resolve().as_uri())
+        except Exception as e:
+            print(f"Error caching {id}: {e}")
+            webbrowser.open(PASTPAPER_URL.format(id))
+    threading.Thread(target=_open, daemon=True).start()
 # --- New UI and Logic Integration ---
 
 class PastPaperApp(tk.Tk):
@@ -161,14 +301,57 @@ class PastPaperApp(tk.Tk):
         self.geometry("900x600")
 
         # --- Application State ---
-        self.filter = Filter()
-        self.search_bar_logic = SearchBar(self.filter)
+        # The vocabulary, LLM client and query engine are built on a background thread
+        # (see _initialise_backend); search stays disabled until they are ready
+        self.filter = None
+        self.search_bar_logic = None
+        self.query_engine = None
         self.export_path = os.getcwd() # Default export path
         self.export_files_logic = ExportFiles(self.export_path)
         self.current_results = [] # Stores rows from DB (QuestionID, Year, Paper, QNum, Topics, Module, Difficulty, Link)
         self.selected_qids = set() # Stores QuestionID of currently selected items
+        # One worker runs searches, newest first; results from a superseded generation are dropped
+        self.search_worker = SearchWorker(self._search_logic)
+        self._search_debounce = None # Pending after() id for a live search
+        self._last_query = None
+        # Paging state of the results on screen: their categories, the cursor for the next page, and the total
+        self.search_categories = []
+        self.search_cursor = None
+        self.search_total = 0
+        self._loading_more = False
+        # Bumped whenever a stage replaces the results, so pages fetched for the old set are dropped
+        self._result_set = 0
+        self.debug_panel = None
 
         self.create_widgets()
+        # F12 shows stage timings; QUESTION_DEBUG=1 opens them at startup
+        self.bind("<F12>", lambda e: self.toggle_debug_panel())
+        if os.environ.get("QUESTION_DEBUG") == "1":
+            self.toggle_debug_panel()
+        threading.Thread(target=self._initialise_backend, daemon=True).start()
+
+    def _initialise_backend(self):
+        """Builds the search components off the UI thread, then enables searching."""
+        try:
+            search_filter = Filter()
+            search_bar_logic = SearchBar(search_filter)
+            # QUESTION_QUERY_ENGINE=bitmap answers searches from an in-memory facet index instead of SQLite
+            if os.environ.get("QUESTION_QUERY_ENGINE") == "bitmap":
+                query_engine = FacetIndex()
+            else:
+                query_engine = QueryEngine()
+        except Exception as e:
+            message = f"Search unavailable: {e}"
+            self.after(0, lambda: self.export_status.config(text=message))
+            return
+        self.after(0, self._backend_ready, search_filter, search_bar_logic, query_engine)
+
+    def _backend_ready(self, search_filter, search_bar_logic, query_engine):
+        self.filter = search_filter
+        self.search_bar_logic = search_bar_logic
+        self.query_engine = query_engine
+        self.search_button.config(state='normal')
+        self.export_status.config(text="Ready.")
 
     def create_widgets(self):
         # --- Main Layout Frames ---
@@ -185,24 +368,16 @@ class PastPaperApp(tk.Tk):
         self.search_entry = ttk.Entry(self.top_frame, font=("Arial", 10))
         self.search_entry.pack(side='left', fill='x', expand=True, padx=(0, 10))
         self.search_entry.bind('<Return>', lambda e: self.perform_search_thread())
+        self.search_entry.bind('<KeyRelease>', self._on_search_typed)
 
-        search_button = ttk.Button(self.top_frame, text="Search", command=self.perform_search_thread)
-        search_button.pack(side='left')
+        self.search_button = ttk.Button(self.top_frame, text="Search", command=self.perform_search_thread, state='disabled')
+        self.search_button.pack(side='left')
 
         # --- 2. Filter Results / Question Display (Middle) ---
         
-        # Canvas and Scrollbar for scrollable content (as suggested by the sketch)
-        results_canvas = tk.Canvas(self.middle_frame)
-        results_canvas.pack(side='left', fill='both', expand=True)
-
-        scrollbar = ttk.Scrollbar(self.middle_frame, orient='vertical', command=results_canvas.yview)
-        scrollbar.pack(side='right', fill='y')
-
-        results_canvas.configure(yscrollcommand=scrollbar.set)
-        results_canvas.bind('<Configure>', lambda e: results_canvas.configure(scrollregion=results_canvas.bbox("all")))
-
-        self.results_frame = ttk.Frame(results_canvas)
-        results_canvas.create_window((0, 0), window=self.results_frame, anchor='nw')
+        # Virtualised list: only the rows in view exist as widgets, however many results there are
+        self.results_view = VirtualResultList(self.middle_frame, self.selected_qids, open_pdf, self._load_more)
+        self.results_view.pack(side='left', fill='both', expand=True)
         
         # Initial call to populate the results area
         self.display_results() 
@@ -222,13 +397,16 @@ class PastPaperApp(tk.Tk):
         
         ttk.Separator(export_panel, orient='horizontal').pack(fill='x', pady=5)
         
-        self.export_status = ttk.Label(export_panel, text="Ready.", wraplength=180)
+        self.export_status = ttk.Label(export_panel, text="Loading search...", wraplength=180)
         self.export_status.pack(pady=(10, 5))
         
         ttk.Button(export_panel, text="Choose Save Folder", command=self.choose_export_path).pack(fill='x', pady=5)
 
         export_button = ttk.Button(export_panel, text="Merge & Export", command=self.export_selected_pdfs_thread)
         export_button.pack(fill='x', pady=10)
+
+        self.export_cancel = threading.Event()
+        ttk.Button(export_panel, text="Cancel Export", command=self.export_cancel.set).pack(fill='x')
         
         # Placeholder for export path display
         self.path_label = ttk.Label(export_panel, text=f"Path: {self.export_path}", wraplength=180)
@@ -239,6 +417,15 @@ class PastPaperApp(tk.Tk):
         self.select_all_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(export_panel, text="Select All/None", variable=self.select_all_var, command=self.toggle_select_all).pack(anchor='w', pady=5)
 
+    def toggle_debug_panel(self):
+        """Opens the live timings window, or closes it if it is already open."""
+        from debugPanel import DebugPanel
+        if self.debug_panel is not None and self.debug_panel.winfo_exists():
+            self.debug_panel.destroy()
+            self.debug_panel = None
+        else:
+            self.debug_panel = DebugPanel(self)
+
     def choose_export_path(self):
         """Opens a dialog to choose the folder for saving the merged PDF."""
         new_path = filedialog.askdirectory(initialdir=self.export_path)
@@ -254,140 +441,148 @@ class PastPaperApp(tk.Tk):
         else:
             self.selected_qids.clear()
         
-        # Update checkboxes visually
-        self.display_results() 
+        # Update checkboxes visually, in place
+        self.results_view.refresh_selection()
+
+    def _on_search_typed(self, event):
+        """Restarts the debounce timer, so a live search runs once typing pauses."""
+        if event.keysym == 'Return':
+            return
+        if self._search_debounce is not None:
+            self.after_cancel(self._search_debounce)
+            self._search_debounce = None
+        if len(self.search_entry.get().strip()) >= SEARCH_MIN_LENGTH:
+            self._search_debounce = self.after(SEARCH_DEBOUNCE_MS, self.perform_search_thread, True)
+
+    def perform_search_thread(self, live: bool = False):
+        """Hands the query to the search worker, superseding any search still in progress."""
+        if self._search_debounce is not None:
+            self.after_cancel(self._search_debounce)
+        self._search_debounce = None
 
-    def perform_search_thread(self):
-        """Runs the search logic in a separate thread to keep the UI responsive."""
         query = self.search_entry.get()
         if not query:
             self.export_status.config(text="Search box is empty.")
             return
+        if self.search_bar_logic is None:
+            if not live:
+                self.export_status.config(text="Still loading search, try again in a moment.")
+            return
+        if live and query == self._last_query:
+            return # Cursor keys and the like fire KeyRelease without changing the query
 
+        self._last_query = query
         self.export_status.config(text=f"Searching for '{query}'...")
-        
-        # Start a thread for the blocking LLM call
-        threading.Thread(target=self._search_logic, args=(query,), daemon=True).start()
-
-    def _search_logic(self, query):
-        """The core search logic using the LLM and DB."""
-        # 1. LLM Search for relevant categories
+        self.search_worker.submit(query)
+
+    def _search_logic(self, query: str, generation: int):
+        """
+        Runs on the search worker: local matches first, then the LLM-expanded ones.
+
+        The local stage is run and shown here; the LLM stage is detached to the
+        worker's pool, so the next query's local results don't wait for it.
+        Each stage is only started while this is still the newest search, so a
+        superseded query never reaches the LLM, and _show_results drops any rows
+        that arrive after a newer search has been submitted.
+        """
+        stages = self.search_bar_logic.search_stages(query)
+        if self._search_stage(stages, generation):
+            self.search_worker.detach(self._finish_search, stages, generation)
+
+    def _finish_search(self, stages, generation: int):
+        while self._search_stage(stages, generation):
+            pass
+
+    def _search_stage(self, stages, generation: int) -> bool:
+        """Runs the next stage of a search and queues its results for display; returns whether another follows."""
+        if not self.search_worker.is_current(generation):
+            return False
         try:
-            categories = self.search_bar_logic.search(query)
+            categories = next(stages)
+        except StopIteration:
+            return False
         except Exception as e:
-            self.after(0, lambda: self.export_status.config(text=f"LLM Search failed: {e}"))
+            message = f"LLM Search failed: {e}"
+            if self.search_worker.is_current(generation):
+                self.after(0, lambda: self.export_status.config(text=message))
+            return False
+        if not self.search_worker.is_current(generation):
+            return False # Superseded while the LLM was answering
+        rows, cursor = self.get_questions_by_categories(categories)
+        with span("db.count", terms=len(categories)):
+            total = self.query_engine.count(categories) if rows else 0
+        self.after(0, self._show_results, generation, categories, rows, cursor, total)
+        return not categories.final
+
+    def _show_results(self, generation: int, categories: "SearchResult", rows: list, cursor, total: int):
+        """Displays the first page of one stage's results on the main thread, unless a newer search has started."""
+        if not self.search_worker.is_current(generation):
+            return
+        self._result_set += 1
+        self.current_results = rows
+        self.search_categories = categories
+        self.search_cursor = cursor
+        self.search_total = total
+        self.display_results()
+        if not categories:
+            self.export_status.config(text="LLM found no matching categories.")
             return
+        status = f"Displaying {len(rows)} of {total} results ({categories.source}): {', '.join(categories[:3])}..."
+        if not categories.final:
+            status += " Refining with LLM..."
+        self.export_status.config(text=status)
+
+    def _load_more(self):
+        """Fetches the next page of the current results when the list is scrolled near its end."""
+        if self.search_cursor is None or self._loading_more:
+            return
+        self._loading_more = True
+        result_set = self._result_set
+        categories, cursor = self.search_categories, self.search_cursor
 
-        # 2. Database Query based on categories
+        def fetch():
+            rows, next_cursor = [], cursor
+            try:
+                rows, next_cursor = self.get_questions_by_categories(categories, cursor)
+            except Exception as e:
+                print(f"Loading more results failed: {e}")
+            finally:
+                # Always handed back, so a failed page doesn't leave paging switched off
+                self.after(0, self._append_results, result_set, rows, next_cursor)
+        threading.Thread(target=fetch, daemon=True).start()
+
+    def _append_results(self, result_set: int, rows: list, cursor):
+        self._loading_more = False
+        if result_set != self._result_set:
+            return # A later stage or search replaced the results this page belongs to
+        self.current_results.extend(rows)
+        self.search_cursor = cursor
+        self.results_view.append_rows(rows)
+        self.export_status.config(text=f"Displaying {len(self.current_results)} of {self.search_total} results.")
+
+    def get_questions_by_categories(self, categories: list[str], after: tuple = None) -> tuple[list, tuple]:
+        """
+        Returns one page of the questions matching the categories, best first, and the cursor for the next.
+
+        OR within a facet, AND across facets; see QueryEngine.page for the ranking.
+        """
         if not categories:
-            self.after(0, lambda: self.export_status.config(text="LLM found no matching categories."))
-            self.current_results = []
-        else:
-            self.after(0, lambda: self.export_status.config(text=f"Found categories: {', '.join(categories[:3])}..."))
-            self.current_results = self.get_questions_by_categories(categories)
-        
-        # 3. Update UI
-        self.after(0, self.display_results)
-        self.after(0, lambda: self.export_status.config(text=f"Displaying {len(self.current_results)} results."))
-
-    def get_questions_by_categories(self, categories: list[str]) -> list:
-        """Queries the database to find questions matching any of the categories."""
-        conn = sqlite3.connect("questions.db")
-        cursor = conn.cursor()
-        
-        # We need to search across all relevant fields for a match
-        fields = ["QuestionID", "Year", "Paper", "QuestionNumber", "Topics", "Module", "Difficulty"]
-        
-        # Build the WHERE clause: match any category in any relevant field
-        # The Topics and Module fields are often stored as JSON strings/lists, so we use LIKE
-        where_clauses = []
-        for cat in categories:
-            # Check for direct match in specific fields
-            where_clauses.append(f"Year = '{cat}'")
-            where_clauses.append(f"Paper = '{cat}'")
-            where_clauses.append(f"QuestionNumber = '{cat}'")
-            # Check for substring match in more complex fields
-            where_clauses.append(f"Topics LIKE '%{cat}%'") 
-            where_clauses.append(f"Module LIKE '%{cat}%'")
-            where_clauses.append(f"Difficulty = '{cat}'")
-
-        if not where_clauses:
-            conn.close()
-            return []
-
-        where_sql = " OR ".join(where_clauses)
-        
-        # Select all fields and append a calculated Link
-        select_fields = ", ".join(fields)
-        # Note: getLink takes (Year, Paper, QuestionNumber) which are columns 1, 2, 3 in the result set
-        query = f"SELECT {select_fields} FROM questions WHERE {where_sql}"
-        
+            return [], None
         try:
-            cursor.execute(query)
-            # Fetch all results and append the calculated link to each row
-            results_with_link = []
-            for row in cursor.fetchall():
-                qid, year, paper, qnum = row[0], row[1], row[2], row[3]
-                # Ensure year, paper, qnum are treated as integers for getLink
-                link = getLink(int(year), paper, qnum) 
-                results_with_link.append(row + (link,)) # Append the link to the tuple
-            
-            conn.close()
-            return results_with_link
-            
+            with span("db.page", terms=len(categories), next_page=after is not None) as query:
+                rows, cursor = self.query_engine.page(categories, PAGE_SIZE, after)
+                query.set(rows=len(rows))
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-            conn.close()
-            return []
+            return [], None
 
-    def display_results(self):
-        """Clears and re-populates the results_frame with checkboxes and placeholders."""
-        # Clear existing widgets
-        for widget in self.results_frame.winfo_children():
-            widget.destroy()
-
-        # If no results, display a message
-        if not self.current_results:
-            ttk.Label(self.results_frame, text="No results found. Try a different search.").pack(padx=20, pady=20)
-            return
+        # Append the calculated link; getLink takes (Year, Paper, QuestionNumber), columns 1, 2, 3
+        with span("links", rows=len(rows)):
+            return [row + (getLink(int(row[1]), row[2], row[3]),) for row in rows], cursor
 
-        # Iterate through results and create an entry for each
-        for i, row in enumerate(self.current_results):
-            qid, year, paper, qnum, topics, module, difficulty, link = row
-            
-            # Use an inner frame for layout consistency (simulating the PDF box in the sketch)
-            item_frame = ttk.Frame(self.results_frame, padding="5", relief=tk.GROOVE)
-            item_frame.grid(row=i // 2, column=i % 2, padx=10, pady=10, sticky='nw')
-
-            # Checkbox: linked to the qid
-            is_selected = qid in self.selected_qids
-            # Note: since we're redrawing, we need to bind the state of a new variable
-            check_var = tk.BooleanVar(value=is_selected) 
-            
-            # The command function handles state change and updates the set
-            def toggle_selection(qid=qid, var=check_var):
-                if var.get():
-                    self.selected_qids.add(qid)
-                else:
-                    self.selected_qids.discard(qid)
-            
-            check_button = ttk.Checkbutton(item_frame, variable=check_var, command=toggle_selection)
-            check_button.pack(anchor='nw', padx=5, pady=5)
-            
-            # Question Info (Simulating a PDF preview)
-            info_text = f"QID: {qid}\nYear: {year} | Paper: {paper} | Q: {qnum}\nTopics: {topics}"
-            ttk.Label(item_frame, text=info_text, wraplength=300, justify=tk.LEFT).pack(padx=5, pady=5, anchor='w')
-            
-            info_text2 = f"Difficulty: {difficulty} | Module: {module}"
-            ttk.Label(item_frame, text=info_text2, wraplength=300, justify=tk.LEFT).pack(padx=5, pady=5, anchor='w')
-            # Placeholder for a PDF image preview (The sketch shows a box with a document icon)
-            # In a real app, you would generate a thumbnail here. For this example, we use a simple label.
-            # Create a small, generic icon/placeholder.
-            icon_button = ttk.Button(item_frame, text="[PDF Preview]", command=lambda qid=qid: open_pdf(qid))
-            icon_button.pack(padx=5, pady=5, anchor='w')
-            # Reconfigure the scroll region after adding new widgets
-            self.results_frame.update_idletasks()
-            self.results_frame.master.config(scrollregion=self.results_frame.master.bbox("all"))
+    def display_results(self):
+        """Hands the current results to the virtualised list, which renders only the visible rows."""
+        self.results_view.set_rows(self.current_results)
 
     def export_selected_pdfs_thread(self):
         """Initiates the PDF merge process in a separate thread."""
@@ -410,21 +605,34 @@ class PastPaperApp(tk.Tk):
         filename = f"Merged_Papers_{len(urls_to_merge)}_Q_{now}.pdf"
 
         self.export_status.config(text=f"Starting merge of {len(urls_to_merge)} PDFs...")
+        self.export_cancel.clear()
         
         # Start the merge process in a thread
         threading.Thread(target=self._export_logic, args=(urls_to_merge, filename), daemon=True).start()
 
+    def _export_progress(self, done: int, total: int, nbytes: int, eta: float):
+        """Reports download progress from the export worker on the main thread."""
+        text = f"Downloading {done}/{total} ({nbytes / 1024:.0f} KB, ETA {eta:.0f}s)"
+        self.after(0, lambda: self.export_status.config(text=text))
+
     def _export_logic(self, urls: list[str], filename: str):
         """The core PDF merging logic."""
+        from pdfMerge import ExportCancelled
         try:
             # The ExportFiles class handles downloading and merging
-            self.export_files_logic.merge_pdfs(urls, filename)
+            self.export_files_logic.merge_pdfs(
+                urls, filename, progress=self._export_progress,
+                memory_limit=EXPORT_MEMORY_LIMIT, cancel=self.export_cancel
+            )
             
             # Update status back on the main thread
             self.after(0, lambda: self.export_status.config(text=f"Export successful! File: {filename}"))
+        except ExportCancelled:
+            self.after(0, lambda: self.export_status.config(text="Export cancelled."))
         except Exception as e:
             # Update status back on the main thread
-            self.after(0, lambda: self.export_status.config(text=f"Export failed: {e}"))
+            message = f"Export failed: {e}"
+            self.after(0, lambda: self.export_status.config(text=message))
 
 # --- Main Application Run ---
 if __name__ == "__main__":
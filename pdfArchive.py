@@ -0,0 +1,283 @@
+"""
+Packed local copy of every past paper PDF, for offline previews and fast bulk exports.
+
+Run from the repository root after ingesting:  python pdfArchive.py [--verify]
+"""
+import io
+import os
+import sys
+import mmap
+import time
+import hashlib
+import pathlib
+import sqlite3
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pdfCache import PdfCache, getLink
+from storage import atomic_output
+
+ARCHIVE_PATH = "pastpapers.pack"
+MAGIC = b"PPACK1\n"
+
+class ArchiveError(Exception):
+    """Raised when the pack file does not match its index."""
+
+class MemberReader(io.RawIOBase):
+    """Read-only, seekable file object over one PDF's bytes in the memory-mapped pack; nothing is copied until read."""
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self._view = view
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = max(0, min(len(buffer), len(self._view) - self._position))
+        buffer[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+class PdfArchive:
+    """
+    Append-only pack of PDFs with an SQLite index of where each one lives.
+
+    The pack is the concatenation of every distinct PDF (deduplicated by
+    SHA-256); the index maps each question id to the offset, length and hash
+    of its bytes. Reads memory-map the pack once and hand out views into it,
+    so an export of hundreds of questions opens no files and copies nothing
+    up front. New PDFs are appended and fsynced before their index rows are
+    committed, so an interrupted append leaves at most unreferenced bytes at
+    the end, which the next append overwrites.
+    """
+    def __init__(self, path: str = ARCHIVE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._map = None
+        self._conn = sqlite3.connect(f"{path}.db", check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS members (
+                    QuestionID TEXT PRIMARY KEY,
+                    Offset INTEGER NOT NULL,
+                    Length INTEGER NOT NULL,
+                    Hash TEXT NOT NULL,
+                    Added REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS members_hash ON members (Hash)")
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ArchiveError(f"{path} is not a past paper archive")
+
+    def _entry(self, question_id: str):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT Offset, Length, Hash FROM members WHERE QuestionID = ?", (question_id,)
+            ).fetchone()
+
+    def __contains__(self, question_id: str) -> bool:
+        return self._entry(question_id) is not None
+
+    def ids(self) -> set[str]:
+        with self._lock:
+            return {id for (id,) in self._conn.execute("SELECT QuestionID FROM members")}
+
+    def _mapping(self, end: int) -> mmap.mmap:
+        # Remapped only when the pack has grown past the current mapping; views into an old mapping keep it alive
+        with self._lock:
+            if self._map is None or len(self._map) < end:
+                with open(self.path, "rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                if len(self._map) < end:
+                    raise ArchiveError(f"{self.path} is truncated: an entry ends at {end}, the file at {len(self._map)}")
+            return self._map
+
+    def view(self, question_id: str) -> memoryview:
+        """Zero-copy view of a question's PDF bytes. Raises KeyError if it is not archived."""
+        entry = self._entry(question_id)
+        if entry is None:
+            raise KeyError(question_id)
+        offset, length, _ = entry
+        return memoryview(self._mapping(offset + length))[offset:offset + length]
+
+    def open(self, question_id: str) -> io.BufferedReader:
+        """File object reading a question's PDF straight from the mapping, for PdfReader and the mergers."""
+        return io.BufferedReader(MemberReader(self.view(question_id)))
+
+    def get(self, question_id: str) -> bytes:
+        with self.view(question_id) as view:
+            return bytes(view)
+
+    def extract(self, question_id: str, directory: str = None) -> pathlib.Path:
+        """
+        Path of a standalone copy of a question's PDF, for handing to an external viewer.
+
+        Copies are named by content hash and written once, so previewing the same
+        question again (or another with identical bytes) reuses the file.
+        """
+        entry = self._entry(question_id)
+        if entry is None:
+            raise KeyError(question_id)
+        directory = pathlib.Path(directory or os.path.join(tempfile.gettempdir(), "pastpapers"))
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / f"{entry[2]}.pdf"
+        if not target.exists():
+            with atomic_output(target) as f, self.view(question_id) as view:
+                f.write(view)
+        return target
+
+    def size(self, question_id: str) -> int:
+        entry = self._entry(question_id)
+        if entry is None:
+            raise KeyError(question_id)
+        return entry[1]
+
+    def add(self, items: list[tuple[str, bytes]]):
+        """Appends (question id, PDF bytes) pairs; content already in the pack is indexed, not stored again."""
+        with self._lock:
+            known = dict(self._conn.execute("SELECT Hash, Offset FROM members"))
+            end = self._conn.execute("SELECT COALESCE(MAX(Offset + Length), ?) FROM members", (len(MAGIC),)).fetchone()[0]
+            rows = []
+            with open(self.path, "r+b") as f:
+                f.seek(end)
+                f.truncate() # Drop bytes left by an append that never reached the index
+                for question_id, content in items:
+                    digest = hashlib.sha256(content).hexdigest()
+                    if digest not in known:
+                        known[digest] = f.tell()
+                        f.write(content)
+                    rows.append((question_id, known[digest], len(content), digest, time.time()))
+                f.flush()
+                os.fsync(f.fileno())
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO members VALUES (?, ?, ?, ?, ?)", rows)
+
+    def remove(self, question_ids: list[str]):
+        """Forgets questions; their bytes stay in the pack until it is rebuilt."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM members WHERE QuestionID = ?", [(id,) for id in question_ids])
+
+    def verify(self) -> list[str]:
+        """Re-hashes every archived PDF and returns the ids whose bytes no longer match the index."""
+        with self._lock:
+            entries = self._conn.execute("SELECT QuestionID, Offset, Length, Hash FROM members ORDER BY Offset").fetchall()
+        if not entries:
+            return []
+        mapping = self._mapping(max(offset + length for _, offset, length, _ in entries))
+        checked, bad = {}, []
+        for question_id, offset, length, digest in entries:
+            key = (offset, length)
+            if key not in checked:
+                checked[key] = hashlib.sha256(mapping[offset:offset + length]).hexdigest()
+            if checked[key] != digest:
+                bad.append(question_id)
+        return bad
+
+    def stats(self) -> dict:
+        with self._lock:
+            members, objects, size = self._conn.execute("""
+                SELECT (SELECT COUNT(*) FROM members), COUNT(*), COALESCE(SUM(Length), 0)
+                FROM (SELECT MAX(Length) AS Length FROM members GROUP BY Hash)
+            """).fetchone()
+        return {"members": members, "objects": objects, "bytes": os.path.getsize(self.path), "referenced": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError:
+                    pass # A reader still holds a view; the mapping goes when it does
+
+def mirror(db_path: str = "questions.db", archive: PdfArchive = None, cache: PdfCache = None,
+           workers: int = 8, batch_size: int = 50) -> dict[str, int]:
+    """
+    Brings the archive up to date with the questions table.
+
+    Only questions not yet archived are fetched (through the shared PDF cache,
+    so anything already downloaded costs no network), which makes a run after
+    ingesting a few questions an incremental append. Questions no longer in
+    the table are dropped from the index.
+    """
+    archive = archive or PdfArchive()
+    cache = cache or PdfCache()
+    conn = sqlite3.connect(db_path)
+    questions = conn.execute("SELECT QuestionID, Year, Paper, QuestionNumber FROM questions").fetchall()
+    conn.close()
+    archived = archive.ids()
+    todo = [row for row in questions if row[0] not in archived]
+    counts = {"added": 0, "present": len(questions) - len(todo), "failed": 0, "removed": 0}
+    start = time.perf_counter()
+
+    def fetch(row):
+        id, year, paper, number = row
+        try:
+            return id, cache.get(id, getLink(year, paper, number))
+        except Exception as e:
+            print(f"Cannot fetch {id}: {e}")
+            return id, None
+
+    batch = []
+    with ThreadPoolExecutor(workers) as pool:
+        for id, content in pool.map(fetch, todo):
+            if content is None:
+                counts["failed"] += 1
+                continue
+            batch.append((id, content))
+            counts["added"] += 1
+            if len(batch) >= batch_size:
+                archive.add(batch)
+                batch.clear()
+    if batch:
+        archive.add(batch)
+
+    stale = archived - {row[0] for row in questions}
+    if stale:
+        archive.remove(list(stale))
+        counts["removed"] = len(stale)
+    print(f"Archived {counts['added']} questions in {time.perf_counter() - start:.1f}s "
+          f"({counts['present']} already present, {counts['failed']} failed, {counts['removed']} removed)")
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mirror every question PDF into one packed archive")
+    parser.add_argument("--db", default="questions.db", help="Questions database to mirror")
+    parser.add_argument("--archive", default=ARCHIVE_PATH, help="Pack file to create or extend")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent downloads")
+    parser.add_argument("--verify", action="store_true", help="Check every archived PDF against its hash, and stop")
+    args = parser.parse_args()
+
+    archive = PdfArchive(args.archive)
+    if args.verify:
+        bad = archive.verify()
+        for id in bad:
+            print(f"Corrupt: {id}")
+        # Dropped from the index, so the next mirror fetches them again
+        archive.remove(bad)
+        print(f"{archive.stats()['members'] - len(bad)} archived PDFs intact, {len(bad)} corrupt")
+        sys.exit(1 if bad else 0)
+    counts = mirror(args.db, archive, workers=args.workers)
+    sys.exit(1 if counts["failed"] else 0)
@@ -0,0 +1,204 @@
+import time
+import hashlib
+import pathlib
+import threading
+from typing import TYPE_CHECKING
+
+from storage import connect, atomic_output
+
+if TYPE_CHECKING: # Annotations only; requests itself is imported on first use
+    import requests
+
+PASTPAPER_URL = "https://www.cl.cam.ac.uk/teaching/exams/pastpapers/{}.pdf"
+
+def getLink(yearSat: int, paper: str, question: int) -> str:
+    """Generates the assumed URL for the PDF based on parameters."""
+    paperNumber = extract_trailing_number(paper)
+    questionNumber = extract_trailing_number(question)
+    return PASTPAPER_URL.format(f"y{yearSat}p{paperNumber}q{questionNumber}")
+
+def extract_trailing_number(s):
+    # Iterate backwards from the end of the string
+    i = len(s) - 1
+    while i >= 0 and s[i].isdigit():
+        i -= 1
+    # The number starts at position i + 1
+    return s[i+1:]
+
+# (connect, read) seconds, so a stalled server fails instead of hanging forever
+TIMEOUT = (5, 30)
+
+def make_session(pool_size: int = 8, retries: int = 3) -> "requests.Session":
+    """Creates a keep-alive session that retries transient failures with exponential backoff."""
+    # Imported here so the app can start without paying for requests until the first download
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class PdfCache:
+    """
+    Content-addressed on-disk cache of past paper PDFs.
+
+    Files are stored once per SHA-256 of their content under objects/, and an
+    index maps each question id to its hash plus the ETag/Last-Modified needed
+    to revalidate it. Entries younger than max_age are served without touching
+    the network; older ones are revalidated with a conditional GET, and still
+    served if that fails. The least recently used entries are evicted once the
+    cache grows past max_bytes.
+    """
+    def __init__(self, root: str = ".pdf_cache", max_bytes: int = 500 * 1024 * 1024,
+                 max_age: float = 30 * 24 * 3600, session: "requests.Session" = None):
+        self.root = pathlib.Path(root)
+        self._session = session
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.index = self.root / "index.db"
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._id_locks = {}
+
+        with connect(self.index) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    QuestionID TEXT PRIMARY KEY,
+                    Hash TEXT NOT NULL,
+                    Size INTEGER NOT NULL,
+                    ETag TEXT,
+                    LastModified TEXT,
+                    Fetched REAL NOT NULL,
+                    Accessed REAL NOT NULL
+                )
+            """)
+
+    @property
+    def session(self) -> "requests.Session":
+        with self._lock:
+            if self._session is None:
+                self._session = make_session()
+            return self._session
+
+    def _object_path(self, digest: str) -> pathlib.Path:
+        return self.objects / f"{digest}.pdf"
+
+    def _id_lock(self, question_id: str) -> threading.Lock:
+        # One lock per question so concurrent callers share a single download
+        with self._lock:
+            return self._id_locks.setdefault(question_id, threading.Lock())
+
+    def path(self, question_id: str, url: str = None) -> pathlib.Path:
+        """Returns the local path of a question's PDF, downloading or revalidating it if needed."""
+        url = url or PASTPAPER_URL.format(question_id)
+        with self._id_lock(question_id):
+            with connect(self.index) as conn:
+                entry = conn.execute(
+                    "SELECT Hash, ETag, LastModified, Fetched FROM entries WHERE QuestionID = ?",
+                    (question_id,)
+                ).fetchone()
+
+            now = time.time()
+            if entry and self._object_path(entry[0]).exists():
+                digest, etag, last_modified, fetched = entry
+                if now - fetched < self.max_age:
+                    self._touch(question_id, now)
+                    return self._object_path(digest)
+                try:
+                    return self._fetch(question_id, url, etag, last_modified, digest)
+                except OSError as e: # requests' errors are OSErrors too
+                    # Offline or the host is failing: a stale copy beats none
+                    print(f"Cannot revalidate {question_id}, using the cached copy: {e}")
+                    self._touch(question_id, now)
+                    return self._object_path(digest)
+            return self._fetch(question_id, url)
+
+    def get(self, question_id: str, url: str = None) -> bytes:
+        """Returns the bytes of a question's PDF."""
+        return self.path(question_id, url).read_bytes()
+
+    def _touch(self, question_id: str, now: float):
+        with connect(self.index) as conn:
+            conn.execute("UPDATE entries SET Accessed = ? WHERE QuestionID = ?", (now, question_id))
+
+    def _fetch(self, question_id, url, etag=None, last_modified=None, cached_digest=None) -> pathlib.Path:
+        headers = {}
+        if cached_digest:
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = self.session.get(url, headers=headers, timeout=TIMEOUT)
+        now = time.time()
+        if response.status_code == 304 and cached_digest:
+            with connect(self.index) as conn:
+                conn.execute(
+                    "UPDATE entries SET Fetched = ?, Accessed = ? WHERE QuestionID = ?",
+                    (now, now, question_id)
+                )
+            return self._object_path(cached_digest)
+        response.raise_for_status()
+
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        target = self._object_path(digest)
+        if not target.exists():
+            # Readers never see a partial PDF
+            with atomic_output(target, fsync=True) as f:
+                f.write(content)
+
+        with connect(self.index) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO entries
+                (QuestionID, Hash, Size, ETag, LastModified, Fetched, Accessed)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (question_id, digest, len(content), response.headers.get("ETag"),
+                  response.headers.get("Last-Modified"), now, now))
+        if cached_digest and cached_digest != digest:
+            self._drop_unreferenced(cached_digest)
+        self._evict(keep=digest)
+        return target
+
+
+    def _drop_unreferenced(self, digest: str):
+        with connect(self.index) as conn:
+            still_used = conn.execute("SELECT 1 FROM entries WHERE Hash = ? LIMIT 1", (digest,)).fetchone()
+        if not still_used:
+            self._object_path(digest).unlink(missing_ok=True)
+
+    def _evict(self, keep: str = None):
+        """Removes least recently used entries until the stored objects fit in max_bytes."""
+        with connect(self.index) as conn:
+            # Size each object once, dated by its most recent access through any question id
+            objects = conn.execute("""
+                SELECT Hash, MAX(Size), MAX(Accessed) FROM entries
+                GROUP BY Hash ORDER BY MAX(Accessed)
+            """).fetchall()
+            total = sum(size for _, size, _ in objects)
+            for digest, size, _ in objects:
+                if total <= self.max_bytes:
+                    break
+                if digest == keep:
+                    continue
+                conn.execute("DELETE FROM entries WHERE Hash = ?", (digest,))
+                self._object_path(digest).unlink(missing_ok=True)
+                total -= size
+
+    def stats(self) -> dict:
+        with connect(self.index) as conn:
+            entries, objects, size = conn.execute("""
+                SELECT (SELECT COUNT(*) FROM entries), COUNT(*), COALESCE(SUM(Size), 0)
+                FROM (SELECT MAX(Size) AS Size FROM entries GROUP BY Hash)
+            """).fetchone()
+        return {"entries": entries, "objects": objects, "bytes": size}
@@ -0,0 +1,175 @@
+import os
+import threading
+import PyPDF2
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import (ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject,
+                            NumberObject, StreamObject)
+
+from storage import atomic_output
+
+# StreamingPdfMerger writes its own xref and trailer through PyPDF2 internals (_objects, _pages,
+# _root, _info, reset_translation, StreamObject._data), so it is only used with the release it
+# was written and tested against; ExportFiles merges in memory under any other
+PYPDF2_VERSION = "3.0.1"
+
+def streaming_supported() -> bool:
+    return PyPDF2.__version__ == PYPDF2_VERSION
+
+class ExportCancelled(Exception):
+    """Raised when a streaming merge is cancelled part way through."""
+
+class StreamingPdfMerger(PdfWriter):
+    """
+    Merges PDFs into an output stream a page at a time.
+
+    Pages are cloned into the writer as usual, but whenever the cloned stream
+    data pending in memory exceeds memory_limit (and after every input) the
+    pending objects are serialised straight to the output and replaced by
+    empty stubs. Only the page tree, catalogue and info dictionaries stay
+    resident until close(), so peak memory no longer grows with the number of
+    inputs. Before each flush, streams identical to one already written (for
+    example the same embedded font in many questions) are redirected to the
+    earlier copy and left out of the file.
+    """
+    def __init__(self, stream, memory_limit: int = 16 * 1024 * 1024):
+        super().__init__()
+        self.pdf_header = b"%PDF-1.7"
+        self.memory_limit = memory_limit
+        self.deduplicated = 0
+        self._out = stream
+        self._offsets = {}      # idnum -> byte offset of everything written so far
+        self._flushed = 0       # self._objects[:_flushed] have been written or stubbed
+        self._pending_bytes = 0
+        self._counted = 0       # self._objects[:_counted] are included in _pending_bytes
+        self._streams = {}      # hash of a written stream -> its IndirectObject
+        self._redirects = {}    # idnum of a dropped duplicate -> IndirectObject kept instead
+        self._resident = {self._pages.idnum, self._info.idnum, self._root.idnum}
+
+        self._out.write(self.pdf_header + b"\n%\xE2\xE3\xCF\xD3\n")
+
+    def append_file(self, source, cancel: threading.Event = None):
+        """
+        Appends every page of a PDF, flushing to the output as the memory limit is reached.
+
+        source is a path, or a binary file object such as a member of the packed archive.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                self._append_stream(f, cancel)
+        else:
+            self._append_stream(source, cancel)
+
+    def _append_stream(self, stream, cancel: threading.Event = None):
+        reader = PdfReader(stream)
+        for page in reader.pages:
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            self.add_page(page)
+            self._count_pending()
+            if self._pending_bytes >= self.memory_limit:
+                self._flush()
+        self._flush()
+        self.reset_translation(reader)
+
+    def _count_pending(self):
+        for obj in self._objects[self._counted:]:
+            if isinstance(obj, StreamObject):
+                self._pending_bytes += len(obj._data or b"")
+        self._counted = len(self._objects)
+
+    def _redirect(self, obj):
+        """Rewrites references to dropped duplicates inside obj, in place."""
+        if isinstance(obj, DictionaryObject):
+            items = obj.items()
+        elif isinstance(obj, ArrayObject):
+            items = enumerate(obj)
+        else:
+            return
+        for key, value in list(items):
+            if isinstance(value, IndirectObject):
+                if value.idnum in self._redirects:
+                    obj[key] = self._redirects[value.idnum]
+            else:
+                self._redirect(value)
+
+    def _flush(self):
+        pending = range(self._flushed, len(self._objects))
+
+        for i in pending:
+            obj = self._objects[i]
+            if isinstance(obj, StreamObject) and i + 1 not in self._resident:
+                self._redirect(obj)
+                digest = obj.hash_value()
+                if digest in self._streams:
+                    self._redirects[i + 1] = self._streams[digest]
+                    self.deduplicated += 1
+                else:
+                    self._streams[digest] = obj.indirect_reference
+
+        for i in pending:
+            idnum = i + 1
+            obj = self._objects[i]
+            if idnum in self._resident:
+                continue
+            if idnum not in self._redirects:
+                self._redirect(obj)
+                self._offsets[idnum] = self._out.tell()
+                self._write_object(idnum, obj)
+            # Later pages of the same input still resolve their clones through the
+            # writer, so keep a stub carrying the reference rather than the object
+            stub = NullObject()
+            stub.indirect_reference = self._redirects.get(idnum, obj.indirect_reference)
+            self._objects[i] = stub
+
+        self._flushed = len(self._objects)
+        self._counted = self._flushed
+        self._pending_bytes = 0
+
+    def _write_object(self, idnum: int, obj):
+        self._out.write(f"{idnum} 0 obj\n".encode())
+        obj.write_to_stream(self._out, None)
+        self._out.write(b"\nendobj\n")
+
+    def close(self):
+        """Writes the page tree, catalogue, cross-reference table and trailer."""
+        self._flush()
+        for idnum in sorted(self._resident):
+            obj = self._objects[idnum - 1]
+            self._redirect(obj)
+            self._offsets[idnum] = self._out.tell()
+            self._write_object(idnum, obj)
+
+        size = len(self._objects) + 1
+        xref_location = self._out.tell()
+        self._out.write(f"xref\n0 {size}\n".encode())
+        self._out.write(b"0000000000 65535 f \n")
+        for idnum in range(1, size):
+            if idnum in self._offsets:
+                self._out.write(f"{self._offsets[idnum]:010} 00000 n \n".encode())
+            else:
+                self._out.write(b"0000000000 00001 f \n")
+
+        trailer = DictionaryObject({
+            NameObject("/Size"): NumberObject(size),
+            NameObject("/Root"): self._root,
+            NameObject("/Info"): self._info,
+        })
+        self._out.write(b"trailer\n")
+        trailer.write_to_stream(self._out, None)
+        self._out.write(f"\nstartxref\n{xref_location}\n%%EOF\n".encode())
+
+def merge_files(paths: list, output_filepath: str, memory_limit: int = 16 * 1024 * 1024,
+                cancel: threading.Event = None) -> int:
+    """
+    Streams the PDFs at paths (or binary file objects), in order, into output_filepath.
+
+    The output is written to a temporary file beside the target and renamed
+    into place on success, so a cancelled or failed merge leaves nothing behind.
+    Returns the number of duplicate streams that were left out.
+    """
+    with atomic_output(output_filepath) as out:
+        merger = StreamingPdfMerger(out, memory_limit)
+        for path in paths:
+            merger.append_file(path, cancel)
+        merger.close()
+    return merger.deduplicated
@@ -0,0 +1,219 @@
+import re
+import sqlite3
+from typing import NamedTuple
+
+import textIndex
+
+FIELDS = ["QuestionID", "Year", "Paper", "QuestionNumber", "Topics", "Module", "Difficulty"]
+
+# Categories that name an exact facet value are recognised by shape; anything else is topic text
+FACET_PATTERNS = [
+    ("QuestionID", re.compile(r"y\d{4}p\d+q\d+")),
+    ("Year", re.compile(r"\d{4}")),
+    ("Paper", re.compile(r"Paper \d+")),
+    ("QuestionNumber", re.compile(r"Question \d+")),
+    ("Difficulty", re.compile(r"Easy|Medium|Hard|None")),
+]
+
+SCHEMA = """
+    CREATE INDEX IF NOT EXISTS idx_questions_year ON questions (Year);
+    CREATE INDEX IF NOT EXISTS idx_questions_paper ON questions (Paper);
+    CREATE INDEX IF NOT EXISTS idx_questions_number ON questions (QuestionNumber);
+    CREATE INDEX IF NOT EXISTS idx_questions_difficulty ON questions (Difficulty);
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5 (
+        Topics, Module, content='questions', content_rowid='rowid'
+    );
+
+    -- INSERT OR REPLACE removes the old row without firing delete triggers,
+    -- so drop its index entry before the insert instead
+    CREATE TRIGGER IF NOT EXISTS questions_fts_before_insert BEFORE INSERT ON questions BEGIN
+        INSERT INTO questions_fts (questions_fts, rowid, Topics, Module)
+        SELECT 'delete', rowid, Topics, Module FROM questions WHERE QuestionID = new.QuestionID;
+    END;
+    CREATE TRIGGER IF NOT EXISTS questions_fts_after_insert AFTER INSERT ON questions BEGIN
+        INSERT INTO questions_fts (rowid, Topics, Module) VALUES (new.rowid, new.Topics, new.Module);
+    END;
+    CREATE TRIGGER IF NOT EXISTS questions_fts_after_delete AFTER DELETE ON questions BEGIN
+        INSERT INTO questions_fts (questions_fts, rowid, Topics, Module)
+        VALUES ('delete', old.rowid, old.Topics, old.Module);
+    END;
+    CREATE TRIGGER IF NOT EXISTS questions_fts_after_update AFTER UPDATE ON questions BEGIN
+        INSERT INTO questions_fts (questions_fts, rowid, Topics, Module)
+        VALUES ('delete', old.rowid, old.Topics, old.Module);
+        INSERT INTO questions_fts (rowid, Topics, Module) VALUES (new.rowid, new.Topics, new.Module);
+    END;
+"""
+
+def ensure_schema(conn: sqlite3.Connection):
+    """
+    Creates the facet indexes and the Topics/Module full-text index, populating it on first use.
+
+    The question body index is created too (empty until textIndex is run), so queries can always join it.
+    """
+    created = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'questions_fts'"
+    ).fetchone() is None
+    conn.executescript(SCHEMA)
+    if created:
+        conn.execute("INSERT INTO questions_fts (questions_fts) VALUES ('rebuild')")
+    conn.commit()
+    textIndex.ensure_schema(conn)
+
+def classify(categories: list[str]) -> tuple[dict[str, list[str]], list[str]]:
+    """Splits categories into exact facet values per column and free-text topic terms."""
+    facets, text = {}, []
+    for category in dict.fromkeys(str(c).strip() for c in categories):
+        if not category:
+            continue
+        for column, pattern in FACET_PATTERNS:
+            if pattern.fullmatch(category):
+                facets.setdefault(column, []).append(category)
+                break
+        else:
+            text.append(category)
+    return facets, text
+
+def fts_phrase(term: str) -> str:
+    """Quotes a term as an FTS5 phrase, so punctuation and operators in topics are matched literally."""
+    return '"' + term.replace('"', '""') + '"'
+
+# What each kind of match adds to a question's score. Facets filter, so every result
+# matches one value of each facet asked for; topic text is what tells results apart.
+WEIGHTS = {
+    "Topics": 4.0, "Module": 2.0, "Body": 1.0,
+    "QuestionID": 1.0, "Paper": 1.0, "QuestionNumber": 1.0, "Difficulty": 1.0, "Year": 0.5,
+}
+
+class Parts(NamedTuple):
+    """The pieces of a categories query, each with its parameters in the order they appear in the SQL."""
+    with_sql: str
+    with_params: list
+    score_sql: str
+    score_params: list
+    from_sql: str
+    where_sql: str
+    where_params: list
+
+def build_parts(categories: list[str]) -> "Parts | None":
+    """
+    Turns categories into query parts: OR within a facet, AND across facets.
+
+    Topic terms are matched against the full-text index over Topics and Module,
+    which together form one facet, as the old substring match did, and also
+    against the text of the question itself. Each question is scored by the
+    weighted matches it makes: a term found in its Topics counts most, then
+    Module, then the body. Returns None when there is nothing to search for.
+    """
+    facets, text = classify(categories)
+    if not facets and not text:
+        return None
+    clauses, where_params = [], []
+    for column, values in facets.items():
+        clauses.append(f"q.{column} IN ({', '.join('?' * len(values))})")
+        where_params.extend(values)
+    base = sum(WEIGHTS[column] for column in facets)
+    if not text:
+        return Parts("", [], f"{base}", [], "questions q", " AND ".join(clauses), where_params)
+
+    # Candidates are the union of topic and body matches, so the scan is driven by the two FTS indexes
+    clauses.append("q.rowid IN (SELECT rowid FROM topic UNION SELECT Row FROM body)")
+    with_sql = (
+        "WITH topic AS (SELECT rowid FROM questions_fts WHERE questions_fts MATCH ?), "
+        f"body AS (SELECT questions.rowid AS Row, matches.Rank FROM ({textIndex.BODY_MATCH_SQL}) matches "
+        "JOIN questions ON questions.QuestionID = matches.QuestionID) "
+    )
+    match = " OR ".join(fts_phrase(t) for t in text)
+    score, score_params = [f"{base}", f"{WEIGHTS['Body']} * (body.Row IS NOT NULL)"], []
+    for term in text:
+        for column in ("Topics", "Module"):
+            score.append(f"{WEIGHTS[column]} * (q.rowid IN (SELECT rowid FROM questions_fts WHERE questions_fts MATCH ?))")
+            score_params.append(f"{column} : {fts_phrase(term)}")
+    return Parts(
+        with_sql, [match, match], " + ".join(score), score_params,
+        "questions q LEFT JOIN body ON body.Row = q.rowid", " AND ".join(clauses), where_params
+    )
+
+def build_query(categories: list[str], limit: int = None, after: tuple = None) -> tuple[str, list]:
+    """
+    Builds a parameterised query for the matching rows, best score first.
+
+    Each row comes back as FIELDS followed by its sort key (negated score,
+    BM25 rank of a body match, rowid). Passing the last key of one page as
+    after continues from there (keyset pagination), so no page re-reads the
+    rows before it, and limit caps the page.
+    """
+    parts = build_parts(categories)
+    if parts is None:
+        return "", []
+    columns = ", ".join(f"q.{field}" for field in FIELDS)
+    rank = "COALESCE(body.Rank, 0)" if parts.with_sql else "0"
+    query = (
+        f"{parts.with_sql}SELECT * FROM ("
+        f"SELECT {columns}, -({parts.score_sql}) AS NegScore, {rank} AS BodyRank, q.rowid AS Row "
+        f"FROM {parts.from_sql} WHERE {parts.where_sql})"
+    )
+    params = parts.with_params + parts.score_params + parts.where_params
+    if after is not None:
+        query += " WHERE (NegScore, BodyRank, Row) > (?, ?, ?)"
+        params += list(after)
+    query += " ORDER BY NegScore, BodyRank, Row"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
+def build_count_query(categories: list[str]) -> tuple[str, list]:
+    """Builds a COUNT(*) over the matching rows, without the scoring or the body-rank join."""
+    parts = build_parts(categories)
+    if parts is None:
+        return "", []
+    return (
+        f"{parts.with_sql}SELECT COUNT(*) FROM questions q WHERE {parts.where_sql}",
+        parts.with_params + parts.where_params
+    )
+
+class QueryEngine:
+    def __init__(self, db_path: str = "questions.db"):
+        self.db_path = db_path
+        conn = sqlite3.connect(self.db_path)
+        ensure_schema(conn)
+        conn.close()
+
+    def _execute(self, query: str, params: list) -> list[tuple]:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+    def find(self, categories: list[str]) -> list[tuple]:
+        """Returns every row (in FIELDS order) matching the categories, best first."""
+        query, params = build_query(categories)
+        if not query:
+            return []
+        return [row[:len(FIELDS)] for row in self._execute(query, params)]
+
+    def page(self, categories: list[str], limit: int, after: tuple = None) -> tuple[list[tuple], tuple]:
+        """
+        Returns up to limit matching rows, best first, and the cursor for the next page.
+
+        The cursor is None once there are no more rows; otherwise pass it back
+        as after to get the page that follows.
+        """
+        query, params = build_query(categories, limit + 1, after)
+        if not query:
+            return [], None
+        rows = self._execute(query, params)
+        cursor = tuple(rows[limit - 1][len(FIELDS):]) if len(rows) > limit else None
+        return [row[:len(FIELDS)] for row in rows[:limit]], cursor
+
+    def count(self, categories: list[str]) -> int:
+        """Returns how many rows match the categories."""
+        query, params = build_count_query(categories)
+        return self._execute(query, params)[0][0] if query else 0
+
+    def explain(self, categories: list[str]) -> list[str]:
+        """Returns the EXPLAIN QUERY PLAN details for the query built from categories."""
+        query, params = build_query(categories)
+        return [row[3] for row in self._execute(f"EXPLAIN QUERY PLAN {query}", params)]
@@ -0,0 +1,94 @@
+import re
+from typing import NamedTuple
+
+# Words that carry no facet or topic meaning at either end of what is left once the structured
+# parts of a query are removed. Inside it they are kept, as they can be part of a topic's name.
+FILLER = {
+    "a", "an", "the", "all", "any", "anything", "some", "every", "questions", "question", "papers",
+    "paper", "past", "on", "about", "from", "in", "of", "for", "with", "and", "or", "to", "between",
+    "through", "until", "year", "years", "please", "exam", "exams", "everything", "that", "are", "is",
+    "which", "what", "topic", "topics", "only", "just",
+}
+# Requests that are filler only at the start, as in "show me" or "find", but not "union find"
+LEADING = {"give", "me", "show", "find", "get", "want", "need", "i"}
+
+WORD = re.compile(r"[\w'+#]+")
+CUT = "\0" # Stands in for each removed span, so filler beside it is trimmed as at the ends of the query
+
+RANGE = r"(?:to|-|–|through|until)"
+SEPARATOR = r"(?:,|&|\band\b|\bor\b)"
+NUMBER_LIST = rf"\d+(?:\s*(?:{RANGE}|{SEPARATOR})\s*\d+)*"
+
+YEAR_PATTERN = re.compile(rf"\b(?:19|20)\d{{2}}(?:\s*(?:{RANGE}|{SEPARATOR})\s*(?:19|20)\d{{2}})*\b")
+PAPER_PATTERN = re.compile(rf"\bpapers?\s*({NUMBER_LIST})\b", re.IGNORECASE)
+QUESTION_PATTERN = re.compile(rf"\b(?:questions?|q)\s*({NUMBER_LIST})\b", re.IGNORECASE)
+DIFFICULTY_PATTERN = re.compile(r"\b(easy|medium|hard)\b", re.IGNORECASE)
+
+class ParsedQuery(NamedTuple):
+    categories: list[str]  # Vocabulary values resolved locally
+    residual: str          # Free text left over for the LLM, empty if nothing remains
+
+def expand_numbers(text: str) -> list[int]:
+    """Expands an enumeration such as "1, 3 and 5 to 7" into [1, 3, 5, 6, 7]."""
+    numbers = []
+    for part in re.split(rf"\s*{SEPARATOR}\s*", text, flags=re.IGNORECASE):
+        bounds = re.fullmatch(rf"(\d+)\s*{RANGE}\s*(\d+)", part.strip(), re.IGNORECASE)
+        if bounds:
+            low, high = sorted(int(n) for n in bounds.groups())
+            numbers.extend(range(low, high + 1))
+        elif part.strip().isdigit():
+            numbers.append(int(part))
+    return numbers
+
+def trim(text: str) -> str:
+    """Strips filler words from both ends of text, keeping everything between them as written."""
+    words = [(m.start(), m.end(), m.group(0).lower()) for m in WORD.finditer(text)]
+    start, end = 0, len(words)
+    while start < end and (words[start][2] in FILLER or words[start][2] in LEADING):
+        start += 1
+    while end > start and words[end - 1][2] in FILLER:
+        end -= 1
+    if start == end:
+        return ""
+    return " ".join(text[words[start][0]:words[end - 1][1]].split())
+
+class QueryParser:
+    """
+    Deterministic parser for the structured parts of a search query.
+
+    Years (including ranges and enumerations), "Paper N", "Question N",
+    difficulties and exact topic or module names are resolved directly
+    against the Filter vocabulary and cut out of the query. Whatever is left,
+    with filler trimmed from the ends of each remaining piece, is returned as
+    the residual for the LLM to interpret.
+    """
+    def __init__(self, filter_instance):
+        self.years = set(filter_instance.years)
+        self.papers = set(filter_instance.papers)
+        self.questions = set(filter_instance.questions)
+        self.difficulties = {d.lower(): d for d in filter_instance.difficulties}
+
+        # One alternation, longest names first so "Finite Automata Theory" wins over "Finite Automata"
+        self.names = {n.strip().lower(): n for n in filter_instance.topics + filter_instance.modules if n.strip()}
+        alternatives = "|".join(re.escape(key) for key in sorted(self.names, key=len, reverse=True))
+        self.name_pattern = re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE) if self.names else None
+
+    def parse(self, query: str) -> ParsedQuery:
+        categories = []
+        text = query
+
+        def take(pattern, resolve):
+            nonlocal text
+            for match in pattern.finditer(text):
+                categories.extend(resolve(match))
+            text = pattern.sub(CUT, text)
+
+        if self.name_pattern:
+            take(self.name_pattern, lambda m: [self.names[m.group(0).lower()]])
+        take(YEAR_PATTERN, lambda m: [str(y) for y in expand_numbers(m.group(0)) if str(y) in self.years])
+        take(PAPER_PATTERN, lambda m: [f"Paper {n}" for n in expand_numbers(m.group(1)) if f"Paper {n}" in self.papers])
+        take(QUESTION_PATTERN, lambda m: [f"Question {n}" for n in expand_numbers(m.group(1)) if f"Question {n}" in self.questions])
+        take(DIFFICULTY_PATTERN, lambda m: [self.difficulties[m.group(1).lower()]] if m.group(1).lower() in self.difficulties else [])
+
+        pieces = [trim(piece) for piece in text.split(CUT)]
+        return ParsedQuery(list(dict.fromkeys(categories)), " ".join(piece for piece in pieces if piece))
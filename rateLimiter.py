@@ -0,0 +1,243 @@
+import os
+import time
+import uuid
+import heapq
+import sqlite3
+import itertools
+import threading
+import contextlib
+from collections import deque
+
+# Lower runs first: a search the user is waiting on goes ahead of queued ingestion
+INTERACTIVE, BULK = 0, 1
+
+LIMITER_PATH = "gemini_limiter.db"
+
+# Longest a waiter sleeps before looking again for slots freed by other processes
+POLL = 0.1
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS bucket (
+        Id INTEGER PRIMARY KEY CHECK (Id = 1),
+        Tokens REAL NOT NULL,
+        Updated REAL NOT NULL,
+        ConcurrencyLimit REAL NOT NULL,
+        Granted INTEGER NOT NULL DEFAULT 0,
+        Throttled INTEGER NOT NULL DEFAULT 0,
+        InteractiveSeen REAL NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS slots (
+        Id INTEGER PRIMARY KEY,
+        Owner TEXT NOT NULL,
+        Priority INTEGER NOT NULL,
+        Started REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS waiting (
+        Owner TEXT NOT NULL,
+        Ticket INTEGER NOT NULL,
+        Priority INTEGER NOT NULL,
+        Since REAL NOT NULL,
+        Seen REAL NOT NULL,
+        PRIMARY KEY (Owner, Ticket)
+    );
+"""
+
+def is_throttled(error: Exception) -> bool:
+    """Whether an API error means "slow down" (HTTP 429/503, quota exhausted) rather than a real failure."""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if code in (429, 503):
+        return True
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text or "quota" in text.lower()
+
+class RateLimiter:
+    """
+    Client-side scheduler for Gemini requests, shared by every caller of the app on this machine.
+
+    A token bucket (rate per second, up to burst) spaces requests out, and an
+    adaptive concurrency limit caps how many run at once: each success raises
+    it by about one per limit's worth of calls, and each throttling response
+    halves it and empties the bucket (AIMD, as TCP does).
+
+    The bucket, the limit, the requests in flight and the callers waiting are
+    kept in the SQLite database at path and only changed inside BEGIN IMMEDIATE
+    transactions, so the search GUI and an ingestion run in another process
+    draw on one quota. Waiting callers are served by priority and then arrival
+    order across processes: no bulk caller starts while an interactive one is
+    waiting anywhere, and while searches have run in the last
+    interactive_window seconds, bulk callers leave one slot free when the limit
+    allows, so a search never queues behind a full batch of ingestion calls
+    already in flight. A process that dies mid-request loses its slots after
+    lease seconds and its waiters once they go unrefreshed for heartbeat
+    seconds. With path None the state is in memory, private to this process.
+    """
+    def __init__(self, rate: float = 2.0, burst: int = 4, concurrency: int = 4,
+                 max_concurrency: int = 16, backoff: float = 1.0, path: str = LIMITER_PATH,
+                 interactive_window: float = 60.0, lease: float = 300.0, heartbeat: float = 10.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.backoff = backoff
+        self.interactive_window = interactive_window
+        self.lease = lease
+        self.heartbeat = heartbeat
+        self.owner = uuid.uuid4().hex       # Tells this limiter's rows from other processes'
+        self._waiting = []                  # heap of (priority, sequence) for this process's callers
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._local = threading.local()     # The slot each thread holds between acquire and release
+        self._waits = deque(maxlen=1000)    # Recent queueing delays, in seconds
+
+        # One connection, only used under _condition; autocommit, so transactions are explicit
+        self._conn = sqlite3.connect(os.path.abspath(path) if path else ":memory:", timeout=30,
+                                     isolation_level=None, check_same_thread=False)
+        if path:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+        with self._transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO bucket (Id, Tokens, Updated, ConcurrencyLimit) VALUES (1, ?, ?, ?)",
+                          (float(burst), time.time(), float(concurrency)))
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so two processes can't both read the same free slot
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _try_start(self, ticket: tuple, since: float) -> float:
+        """Takes a slot and a token for ticket if it may start now: returns 0.0 if so, else how long to wait."""
+        priority = ticket[0]
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("UPDATE waiting SET Seen = ? WHERE Owner = ?", (now, self.owner))
+            conn.execute("DELETE FROM waiting WHERE Seen < ?", (now - self.heartbeat,))
+            conn.execute("DELETE FROM slots WHERE Started < ?", (now - self.lease,))
+            tokens, updated, limit, interactive_seen = conn.execute(
+                "SELECT Tokens, Updated, ConcurrencyLimit, InteractiveSeen FROM bucket").fetchone()
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            conn.execute("UPDATE bucket SET Tokens = ?, Updated = ?", (tokens, now))
+
+            # Callers of other processes that came first, or matter more
+            ahead = conn.execute(
+                "SELECT 1 FROM waiting WHERE Owner != ? AND (Priority < ? OR (Priority = ? AND Since < ?)) LIMIT 1",
+                (self.owner, priority, priority, since)
+            ).fetchone()
+            active = conn.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+            limit = int(limit)
+            if priority != INTERACTIVE and now - interactive_seen < self.interactive_window and limit > 1:
+                limit -= 1 # Headroom kept for interactive callers
+            if ahead or active >= limit:
+                return POLL
+            if tokens < 1:
+                return min(POLL * 10, (1 - tokens) / self.rate)
+
+            conn.execute("UPDATE bucket SET Tokens = Tokens - 1, Granted = Granted + 1")
+            conn.execute("DELETE FROM waiting WHERE Owner = ? AND Ticket = ?", (self.owner, ticket[1]))
+            self._local.slot = conn.execute("INSERT INTO slots (Owner, Priority, Started) VALUES (?, ?, ?)",
+                                            (self.owner, priority, now)).lastrowid
+        return 0.0
+
+    def acquire(self, priority: int = BULK):
+        """Blocks until this caller may send a request."""
+        ticket = (priority, next(self._sequence))
+        start = time.monotonic()
+        since = time.time()
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            with self._transaction() as conn:
+                conn.execute("INSERT INTO waiting VALUES (?, ?, ?, ?, ?)", (self.owner, ticket[1], priority, since, since))
+                if priority == INTERACTIVE:
+                    conn.execute("UPDATE bucket SET InteractiveSeen = ?", (since,))
+            try:
+                while True:
+                    wait = self._try_start(ticket, since) if self._waiting[0] == ticket else None
+                    if wait == 0.0:
+                        heapq.heappop(self._waiting)
+                        self._waits.append(time.monotonic() - start)
+                        self._condition.notify_all() # The next in line may be able to go too
+                        return
+                    # Wake when the next token is due, or sooner if a slot frees up here or elsewhere
+                    self._condition.wait(wait)
+            except BaseException:
+                # Interrupted while waiting: give up the place in the queue, here and for other processes
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    with self._transaction() as conn:
+                        conn.execute("DELETE FROM waiting WHERE Owner = ? AND Ticket = ?", (self.owner, ticket[1]))
+                    self._condition.notify_all()
+                raise
+
+    def release(self, outcome: bool = None):
+        """
+        Frees the calling thread's slot, adapting the concurrency limit to how the request went.
+
+        outcome is True for a success, False when the request was throttled,
+        and None for any other failure, which leaves the limit alone.
+        """
+        with self._condition:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM slots WHERE Id = ?", (self._local.slot,))
+                if outcome is True:
+                    conn.execute("UPDATE bucket SET ConcurrencyLimit = MIN(?, ConcurrencyLimit + 1.0 / ConcurrencyLimit)",
+                                 (float(self.max_concurrency),))
+                elif outcome is False:
+                    conn.execute("UPDATE bucket SET Throttled = Throttled + 1, Tokens = 0, Updated = ?, "
+                                 "ConcurrencyLimit = MAX(1.0, ConcurrencyLimit / 2)", (time.time(),))
+            self._local.slot = None
+            self._condition.notify_all()
+
+    def call(self, fn, priority: int = BULK, retries: int = 3):
+        """Runs fn() under the limiter, retrying with backoff while the API reports throttling."""
+        for attempt in range(retries + 1):
+            self.acquire(priority)
+            try:
+                result = fn()
+            except Exception as e:
+                throttled = is_throttled(e)
+                self.release(False if throttled else None)
+                if not throttled or attempt == retries:
+                    raise
+            else:
+                self.release(True)
+                return result
+            time.sleep(self.backoff * 2 ** attempt)
+
+    def metrics(self) -> dict:
+        """Queue and concurrency across every process sharing the limiter, and this process's queueing delays."""
+        with self._condition:
+            waits = sorted(self._waits)
+            waiting = [row[0] for row in self._conn.execute("SELECT Priority FROM waiting")]
+            active = self._conn.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+            limit, granted, throttled = self._conn.execute(
+                "SELECT ConcurrencyLimit, Granted, Throttled FROM bucket").fetchone()
+        metrics = {
+            "queue_depth": len(waiting),
+            "queue_interactive": waiting.count(INTERACTIVE),
+            "active": active,
+            "concurrency_limit": int(limit),
+            "granted": granted,
+            "throttled": throttled,
+        }
+        if waits:
+            metrics["wait_p50"] = waits[len(waits) // 2]
+            metrics["wait_p95"] = waits[min(len(waits) - 1, int(len(waits) * 0.95))]
+            metrics["wait_max"] = waits[-1]
+        return metrics
+
+# The limiter every Gemini call goes through, shared with the app's other processes through the
+# database at GEMINI_LIMITER ("off" keeps it to this process); tune with GEMINI_RATE (requests/s),
+# GEMINI_BURST and GEMINI_MAX_CONCURRENCY to match the project's quota
+_path = os.environ.get("GEMINI_LIMITER", LIMITER_PATH)
+gemini = RateLimiter(
+    rate=float(os.environ.get("GEMINI_RATE", 2.0)),
+    burst=int(os.environ.get("GEMINI_BURST", 4)),
+    max_concurrency=int(os.environ.get("GEMINI_MAX_CONCURRENCY", 16)),
+    path=None if _path.lower() in ("", "0", "off", "none") else _path,
+)
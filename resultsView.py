@@ -0,0 +1,147 @@
+import tkinter as tk
+from tkinter import ttk
+
+from tracing import span
+
+class ResultRow(ttk.Frame):
+    """One reusable row of the results list; rebound to a different result as the list scrolls."""
+    def __init__(self, master, selected: set, on_preview):
+        super().__init__(master, padding="5", relief=tk.GROOVE)
+        self.selected = selected
+        self.qid = None
+
+        self.check_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self, variable=self.check_var, command=self._toggle).pack(side='left', anchor='n', padx=5, pady=5)
+
+        details = ttk.Frame(self)
+        details.pack(side='left', fill='x', expand=True)
+        self.info = ttk.Label(details, wraplength=500, justify=tk.LEFT)
+        self.info.pack(padx=5, pady=(5, 0), anchor='w')
+        self.info2 = ttk.Label(details, wraplength=500, justify=tk.LEFT)
+        self.info2.pack(padx=5, pady=(0, 5), anchor='w')
+
+        ttk.Button(self, text="[PDF Preview]", command=lambda: on_preview(self.qid)).pack(side='right', padx=5, pady=5)
+
+    def _toggle(self):
+        if self.check_var.get():
+            self.selected.add(self.qid)
+        else:
+            self.selected.discard(self.qid)
+
+    def bind_row(self, row: tuple):
+        qid, year, paper, qnum, topics, module, difficulty, link = row
+        self.qid = qid
+        self.check_var.set(qid in self.selected)
+        self.info.config(text=f"QID: {qid}\nYear: {year} | Paper: {paper} | Q: {qnum}\nTopics: {topics}")
+        self.info2.config(text=f"Difficulty: {difficulty} | Module: {module}")
+
+class VirtualResultList(ttk.Frame):
+    """
+    Scrollable results list that only materialises the rows in view.
+
+    The canvas scroll region spans every result at a fixed row height, but
+    only enough ResultRow widgets to fill the viewport are created. Whenever
+    the view moves they are repositioned and rebound to the results now
+    visible, so rendering cost depends on the window size rather than the
+    number of results. Selection lives in the shared `selected` set, and
+    refresh_selection() re-ticks the visible rows without rebuilding them.
+    When the view comes within a screen of the last row, on_end_reached (if
+    given) is called so the next page of results can be appended.
+    """
+    ROW_HEIGHT = 90
+
+    def __init__(self, master, selected: set, on_preview, on_end_reached=None):
+        super().__init__(master)
+        self.selected = selected
+        self.on_preview = on_preview
+        self.on_end_reached = on_end_reached
+        self.rows = []
+        self.pool = []            # (ResultRow, canvas window id)
+        self._render_pending = False
+        self._region = None
+
+        self.canvas = tk.Canvas(self, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.canvas.pack(side='left', fill='both', expand=True)
+
+        self.empty_text = self.canvas.create_text(
+            20, 20, anchor='nw', text="No results found. Try a different search."
+        )
+        self.canvas.bind('<Configure>', lambda e: self._schedule_render())
+        # The results are the only scrollable area, so the wheel scrolls them anywhere in the window
+        self.bind_all('<MouseWheel>', lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, 'units'))
+        self.bind_all('<Button-4>', lambda e: self.canvas.yview_scroll(-1, 'units'))
+        self.bind_all('<Button-5>', lambda e: self.canvas.yview_scroll(1, 'units'))
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_render()
+
+    def _schedule_render(self):
+        # Coalesce bursts of scroll and resize events into one render per idle cycle
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def set_rows(self, rows: list):
+        """Replaces the results shown and scrolls back to the top."""
+        self.rows = list(rows)
+        for row, window in self.pool:
+            row.qid = None # Force every visible row to rebind
+        self.canvas.configure(yscrollincrement=self.ROW_HEIGHT // 3)
+        self._update_region()
+        self.canvas.itemconfigure(self.empty_text, state='hidden' if rows else 'normal')
+        self.canvas.yview_moveto(0)
+        self._schedule_render()
+
+    def append_rows(self, rows: list):
+        """Adds rows to the end of the list, leaving the view where it is."""
+        self.rows.extend(rows)
+        self._schedule_render()
+
+    def refresh_selection(self):
+        """Re-ticks the visible checkboxes from the shared selection set."""
+        for row, window in self.pool:
+            if row.qid is not None:
+                row.check_var.set(row.qid in self.selected)
+
+    def _update_region(self):
+        # Only touch the scroll region when it changes, as that re-fires yscrollcommand
+        region = (0, 0, self.canvas.winfo_width(), len(self.rows) * self.ROW_HEIGHT)
+        if region != self._region:
+            self._region = region
+            self.canvas.configure(scrollregion=region)
+
+    def _render(self):
+        self._render_pending = False
+        # Timed here rather than around set_rows/append_rows, which only schedule this
+        with span("render", rows=len(self.rows)) as render:
+            width = self.canvas.winfo_width()
+            height = self.canvas.winfo_height()
+            self._update_region()
+
+            first = int(self.canvas.canvasy(0) // self.ROW_HEIGHT)
+            needed = height // self.ROW_HEIGHT + 2
+            while len(self.pool) < needed:
+                row = ResultRow(self.canvas, self.selected, self.on_preview)
+                window = self.canvas.create_window(0, 0, window=row, anchor='nw')
+                self.pool.append((row, window))
+
+            rebound = 0
+            for offset, (row, window) in enumerate(self.pool):
+                index = first + offset
+                if offset < needed and index < len(self.rows):
+                    if row.qid != self.rows[index][0]:
+                        row.bind_row(self.rows[index])
+                        rebound += 1
+                    self.canvas.coords(window, 0, index * self.ROW_HEIGHT)
+                    self.canvas.itemconfigure(window, state='normal', width=width, height=self.ROW_HEIGHT - 4)
+                else:
+                    row.qid = None
+                    self.canvas.itemconfigure(window, state='hidden')
+            render.set(rebound=rebound)
+
+        if self.on_end_reached and self.rows and first + 2 * needed >= len(self.rows):
+            self.on_end_reached()
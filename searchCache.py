@@ -0,0 +1,95 @@
+import re
+import json
+import time
+import threading
+
+from storage import connect
+
+def normalise(query: str) -> str:
+    """Lower-cases a query and collapses whitespace and trailing punctuation so trivial variants share an entry."""
+    return re.sub(r"\s+", " ", query).strip(" \t?!.,;:").lower()
+
+class QueryCache:
+    """
+    Persistent cache of search query -> category list.
+
+    Every entry is keyed by the normalised query and a fingerprint of the
+    vocabulary the LLM was prompted with, so ingesting new topics changes the
+    fingerprint and stale answers are simply never looked up again (and are
+    pruned on start-up). Entries expire after ttl seconds, and the least
+    recently used entries are evicted beyond max_entries. Hit and miss counts
+    are kept in the same database so they survive restarts.
+    """
+    def __init__(self, path: str = "search_cache.db", ttl: float = 7 * 24 * 3600, max_entries: int = 1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        with connect(self.path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS queries (
+                    Query TEXT NOT NULL,
+                    Vocabulary TEXT NOT NULL,
+                    Categories TEXT NOT NULL,
+                    Created REAL NOT NULL,
+                    Accessed REAL NOT NULL,
+                    PRIMARY KEY (Query, Vocabulary)
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (Name TEXT PRIMARY KEY, Value INTEGER NOT NULL)")
+            conn.executemany("INSERT OR IGNORE INTO counters VALUES (?, 0)", [("hits",), ("misses",)])
+
+    def _count(self, conn, name: str):
+        conn.execute("UPDATE counters SET Value = Value + 1 WHERE Name = ?", (name,))
+
+    def get(self, query: str, fingerprint: str):
+        """Returns the cached category list for query, or None on a miss or expired entry."""
+        key, now = normalise(query), time.time()
+        with self._lock, connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT Categories, Created FROM queries WHERE Query = ? AND Vocabulary = ?",
+                (key, fingerprint)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self._count(conn, "misses")
+                return None
+            conn.execute(
+                "UPDATE queries SET Accessed = ? WHERE Query = ? AND Vocabulary = ?",
+                (now, key, fingerprint)
+            )
+            self._count(conn, "hits")
+            return json.loads(row[0])
+
+    def put(self, query: str, fingerprint: str, categories: list[str]):
+        now = time.time()
+        with self._lock, connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO queries VALUES (?, ?, ?, ?, ?)",
+                (normalise(query), fingerprint, json.dumps(categories), now, now)
+            )
+            conn.execute("""
+                DELETE FROM queries WHERE rowid IN (
+                    SELECT rowid FROM queries ORDER BY Accessed DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    def prune(self, fingerprint: str):
+        """Drops entries answered against any other vocabulary, and any that have expired."""
+        with self._lock, connect(self.path) as conn:
+            conn.execute(
+                "DELETE FROM queries WHERE Vocabulary != ? OR Created < ?",
+                (fingerprint, time.time() - self.ttl)
+            )
+
+    def stats(self) -> dict:
+        with connect(self.path) as conn:
+            counters = dict(conn.execute("SELECT Name, Value FROM counters"))
+            entries = conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "entries": entries,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+class SearchWorker:
+    """
+    Single background thread that runs only the most recent search.
+
+    Every submit() gets a new generation number and replaces any search still
+    waiting to start, so bursts of keystrokes collapse into one run. The
+    worker thread is meant for the quick local stage; a search hands its LLM
+    stage to detach(), which runs it on a small pool, so the next query's
+    local results never wait for a superseded Gemini call (and its retries) to
+    finish. Detached stages still queued when a newer search is submitted are
+    cancelled; one already running can't be interrupted, but it is expected to
+    check is_current() between stages (before an LLM call, before publishing
+    results) and drop its result once a newer generation exists.
+    """
+    def __init__(self, run, llm_workers: int = 2):
+        self.run = run # Called as run(query, generation) on the worker thread
+        self.generation = 0
+        self._pending = None
+        self._detached = []
+        self._condition = threading.Condition()
+        self._pool = ThreadPoolExecutor(llm_workers, thread_name_prefix="search-llm")
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, query: str) -> int:
+        with self._condition:
+            self.generation += 1
+            self._pending = (query, self.generation)
+            for future in self._detached:
+                future.cancel() # Only stages that haven't started; running ones check is_current()
+            self._detached = []
+            self._condition.notify()
+            return self.generation
+
+    def detach(self, fn, *args) -> Future:
+        """Runs fn(*args) off the worker thread, unless a newer search is submitted before it starts."""
+        with self._condition:
+            future = self._pool.submit(self._call, fn, *args)
+            self._detached = [f for f in self._detached if not f.done()] + [future]
+            return future
+
+    def is_current(self, generation: int) -> bool:
+        return generation == self.generation
+
+    def _call(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"Search failed: {e}")
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+                query, generation = self._pending
+                self._pending = None
+            self._call(self.run, query, generation)
@@ -0,0 +1,122 @@
+import re
+import sqlite3
+from collections import Counter
+
+import numpy as np
+
+def words(text: str) -> list[str]:
+    return re.findall(r"\w+", text.lower())
+
+def char_ngrams(text: str, sizes=(3, 4, 5)) -> list[str]:
+    """Character n-grams of each word (padded with spaces), plus the words themselves, so typos and inflections still overlap."""
+    grams = []
+    for word in words(text):
+        padded = f" {word} "
+        grams.append(word)
+        for n in sizes:
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+class TfidfIndex:
+    """
+    L2-normalised TF-IDF vectors of a fixed set of documents, stored as postings.
+
+    Each term keeps a contiguous slice of (document, weight) pairs, so scoring
+    a query gathers just the postings of its terms and sums them per document
+    with one bincount; the cost follows the query, not the vocabulary size.
+    """
+    def __init__(self, documents: list[list[str]]):
+        self.size = len(documents)
+        self.terms = {}
+        rows, cols, counts = [], [], []
+        for row, tokens in enumerate(documents):
+            for term, count in Counter(tokens).items():
+                rows.append(row)
+                cols.append(self.terms.setdefault(term, len(self.terms)))
+                counts.append(count)
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+
+        df = np.bincount(cols, minlength=len(self.terms))
+        self.idf = np.log((1 + self.size) / (1 + df)) + 1
+        self.unseen_idf = np.log(1 + self.size) + 1 # A query term no document contains
+        weights = (1 + np.log(np.array(counts, dtype=np.float64))) * self.idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights ** 2, minlength=self.size))
+        weights /= norms[rows]
+
+        order = np.argsort(cols, kind="stable")
+        self.rows = rows[order]
+        self.weights = weights[order]
+        self.starts = np.searchsorted(cols[order], np.arange(len(self.terms) + 1))
+
+    def scores(self, tokens: list[str]) -> np.ndarray:
+        """Cosine similarity of the query tokens to every document."""
+        counts = Counter(tokens)
+        if not counts or not self.size:
+            return np.zeros(self.size)
+        # Unknown terms still count towards the query's length, so a query mostly made of them scores low
+        tf = 1 + np.log(np.array(list(counts.values()), dtype=np.float64))
+        known = [self.terms.get(term, -1) for term in counts]
+        idf = np.array([self.idf[i] if i >= 0 else self.unseen_idf for i in known])
+        query = tf * idf
+        query /= np.linalg.norm(query)
+
+        ids = np.array([i for i in known if i >= 0], dtype=np.int64)
+        if not len(ids):
+            return np.zeros(self.size)
+        query = query[[k for k, i in enumerate(known) if i >= 0]]
+        lengths = self.starts[ids + 1] - self.starts[ids]
+        postings = np.concatenate([np.arange(self.starts[i], self.starts[i + 1]) for i in ids])
+        return np.bincount(self.rows[postings], self.weights[postings] * np.repeat(query, lengths), minlength=self.size)
+
+class TopicMatcher:
+    """
+    Offline stand-in for the LLM step of SearchBar: free text -> topic and module names.
+
+    Every Topics and Module value is vectorised as character n-grams, so
+    "number theroy" or "automaton" still land on the right names. When the
+    question text index is populated, each name also gets a word-level profile
+    built from the bodies of its questions, so "shortest path" can find
+    "Graph Algorithms". A name is returned when either cosine similarity clears
+    its threshold, best first, at most limit of them. Years, papers and the
+    like are left to QueryParser, which resolves them exactly.
+    """
+    def __init__(self, names: list[str], bodies: dict[str, list[str]] = None,
+                 threshold: float = 0.35, text_threshold: float = 0.2, limit: int = 8):
+        self.names = list(dict.fromkeys(name for name in names if name))
+        self.threshold = threshold
+        self.text_threshold = text_threshold
+        self.limit = limit
+        self.name_index = TfidfIndex([char_ngrams(name) for name in self.names])
+        self.text_index = None
+        if bodies:
+            self.text_index = TfidfIndex([words(" ".join(bodies.get(name, []))) for name in self.names])
+
+    @classmethod
+    def from_database(cls, filter_instance, db_path: str = "questions.db", **kwargs) -> "TopicMatcher":
+        names = filter_instance.topics + filter_instance.modules
+        bodies = {}
+        conn = sqlite3.connect(db_path)
+        try:
+            for topic, module, body in conn.execute(
+                "SELECT q.Topics, q.Module, t.Body FROM questions q JOIN question_text t ON t.QuestionID = q.QuestionID"
+            ):
+                for name in (topic, module):
+                    if name:
+                        bodies.setdefault(name, []).append(body)
+        except sqlite3.OperationalError:
+            pass # No question text index yet; match on names alone
+        finally:
+            conn.close()
+        return cls(names, bodies, **kwargs)
+
+    def match(self, query: str) -> list[str]:
+        scores = self.name_index.scores(char_ngrams(query))
+        hits = scores >= self.threshold
+        if self.text_index is not None:
+            text_scores = self.text_index.scores(words(query))
+            hits |= text_scores >= self.text_threshold
+            scores = np.maximum(scores, text_scores)
+        ranked = np.flatnonzero(hits)
+        ranked = ranked[np.argsort(-scores[ranked], kind="stable")][:self.limit]
+        return [self.names[i] for i in ranked]
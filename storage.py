@@ -0,0 +1,39 @@
+"""
+SQLite connections and atomic file writes shared by the caches, the archive, the journal and export.
+"""
+import os
+import sqlite3
+import tempfile
+import contextlib
+
+@contextlib.contextmanager
+def connect(path, timeout: float = 30):
+    """Connection to the database at path whose block commits on success and rolls back on error; always closed."""
+    conn = sqlite3.connect(path, timeout=timeout)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+@contextlib.contextmanager
+def atomic_output(path, mode: str = "wb", fsync: bool = False, **kwargs):
+    """
+    File to write path's new content to: with atomic_output("out.pdf") as f: ...
+
+    The content goes to a temporary file beside path, renamed over it when the
+    block finishes, so readers see the old file or the whole new one, never a
+    partial write. If the block raises, the temporary file is removed and path
+    is untouched. fsync flushes the content to disk before the rename.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".part")
+    try:
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -1,9 +1,28 @@
 import os
+import sys
+import csv
+import json
+import math
+import time
+import hashlib
+import queue
 import sqlite3
-import requests
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from google import genai
 from google.genai import types
 import pathlib
+from pdfCache import PdfCache
+from queryEngine import ensure_schema
+from ingestJournal import IngestJournal
+from rateLimiter import gemini, BULK
+import vocabulary
+import pdfArchive
+import tracing
+from tracing import span
+
+pdfCache = PdfCache()
 
 def extractData(id: str) -> tuple[int, int, int]:
     '''
@@ -13,7 +32,7 @@ def extractData(id: str) -> tuple[int, int, int]:
         return (int(id[1:5]), int(id[6:7]), int(id[8:]))
     except:
         return (int(id[1:5]), int(id[6:8]), int(id[9:]))
-    
+
 def difficulty(median: int) -> str:
     '''
     Calculates the difficulty rating
@@ -26,31 +45,11 @@ def difficulty(median: int) -> str:
         return "Hard"
     else:
         return "None"
-    
-def downloadPdf(question_id):
-    pdf_url = f"https://www.cl.cam.ac.uk/teaching/exams/pastpapers/{question_id}.pdf"
-    print(f"Attempting to download: {pdf_url}")
-
-    output_url = f"gemini.pdf"
-
-    reponse = requests.get(pdf_url)
-    with open(output_url, "wb") as f:
-        f.write(reponse.content)
-
-def uploadPdf(question_id: str) -> str:
-    downloadPdf(question_id)
-
-    path = pathlib.Path("gemini.pdf")
-    if not path.exists():
-        return f"Error: File not found at gemini.pdf"
-    
-    with genai.Client(api_key=api_key) as client:    
-        uploaded_file = client.files.upload(
-            file=path,
-            config={'display_name': path.name}
-        )        
-
-        systemInstructionText = """
+
+MODEL = "gemini-2.5-flash"
+PROMPT_VERSION = 1 # Bump whenever SYSTEM_INSTRUCTION or BATCH_INSTRUCTION changes, so rows get reclassified
+
+SYSTEM_INSTRUCTION = """
                 You are an expert Cambridge Computer Science examiner.
                 Your task is to classify the provided past paper question (a PDF) into a precise subtopic.
                 Analyze the content of the PDF file and return the single most relevant and specific subtopic.
@@ -58,22 +57,131 @@ def uploadPdf(question_id: str) -> str:
                 Always choose the most specific topic that fits the question.
                 Example valid outputs: "Automaton Theory", "Turing Machines", "Complexity Theory".
             """
-        config = types.GenerateContentConfig(
-            system_instruction=systemInstructionText,
-            temperature=0.2
-        )
-            
-        prompt = "Analyze this past paper question and return the most specific subtopic."
 
-        response = client.models.generate_content(
-            model = "gemini-2.5-flash",
-            contents=[uploaded_file, prompt],
-            config=config   
-        )
-            
+BATCH_INSTRUCTION = """
+                You are an expert Cambridge Computer Science examiner.
+                Your task is to classify each provided past paper question (a PDF, preceded by its id) into a precise subtopic.
+                Analyze the content of each PDF file and choose the single most relevant and specific subtopic for it.
+                Always choose the most specific topic that fits the question.
+                Example valid subtopics: "Automaton Theory", "Turing Machines", "Complexity Theory".
+                You must ONLY return a JSON object mapping every question id to its subtopic string, e.g.
+                {"y2023p1q1": "Turing Machines", "y2023p1q2": "Complexity Theory"}
+            """
+
+_client = None
+_clientLock = threading.Lock()
+
+def getClient() -> genai.Client:
+    '''
+    Returns the Gemini client shared by every classification in this process
+    '''
+    global _client
+    with _clientLock:
+        if _client is None:
+            _client = genai.Client(api_key=api_key)
+        return _client
+
+def classifyPdf(path: pathlib.Path) -> str:
+    '''
+    Uploads a downloaded question PDF to Gemini and returns its subtopic
+    '''
+    client = getClient()
+    uploaded_file = client.files.upload(
+        file=path,
+        config={'display_name': path.name}
+    )
+
+    config = types.GenerateContentConfig(
+        system_instruction=SYSTEM_INSTRUCTION,
+        temperature=0.2
+    )
+
+    prompt = "Analyze this past paper question and return the most specific subtopic."
+
+    def request():
+        # Timed inside the limiter, so the span covers the request and not the queueing or backoff
+        with span("llm", questions=1, model=MODEL):
+            return client.models.generate_content(
+                model = MODEL,
+                contents=[uploaded_file, prompt],
+                config=config
+            )
+
+    try:
+        response = gemini.call(request, priority=BULK)
+    finally:
         client.files.delete(name=uploaded_file.name)
-        return response.text
-    
+    return response.text
+
+def parseBatch(text: str, ids: list[str]) -> dict[str, str]:
+    '''
+    Reads the subtopics for ids out of a batch response, skipping any missing or malformed entries
+    '''
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json")
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {id: data[id].strip() for id in ids if isinstance(data.get(id), str) and data[id].strip()}
+
+def classifyBatch(paths: dict[str, pathlib.Path], onTopic=None) -> tuple[dict[str, str], int, dict[str, Exception]]:
+    '''
+    Classifies several downloaded questions in one Gemini request
+
+    The PDFs are sent inline, each labelled with its id, and the model answers
+    with a JSON object of id -> subtopic. Any question the response does not
+    cover is reclassified on its own with classifyPdf. Each subtopic is passed
+    to onTopic(id, topic) as soon as it is known, so the caller can record it
+    before a fallback runs. Returns the subtopics, the number of
+    generate_content calls made, and the error of each fallback that failed;
+    only a failure of the batch request itself is raised.
+    '''
+    topics, failures = {}, {}
+
+    def found(id, topic):
+        topics[id] = topic
+        if onTopic:
+            onTopic(id, topic)
+
+    if len(paths) == 1:
+        (id, path), = paths.items()
+        found(id, classifyPdf(path))
+        return topics, 1, failures
+
+    contents = []
+    for id, path in paths.items():
+        contents.append(f"Question {id}:")
+        contents.append(types.Part.from_bytes(data=path.read_bytes(), mime_type="application/pdf"))
+    contents.append("Classify every question above and return the JSON object.")
+
+    config = types.GenerateContentConfig(
+        system_instruction=BATCH_INSTRUCTION,
+        temperature=0.2,
+        response_mime_type="application/json"
+    )
+
+    def request():
+        with span("llm", questions=len(paths), model=MODEL):
+            return getClient().models.generate_content(model=MODEL, contents=contents, config=config)
+
+    response = gemini.call(request, priority=BULK)
+    for id, topic in parseBatch(response.text or "", list(paths)).items():
+        found(id, topic)
+    calls = 1
+    for id, path in paths.items():
+        if id not in topics:
+            print(f"Batch response had no subtopic for {id}, classifying it alone")
+            calls += 1
+            try:
+                found(id, classifyPdf(path))
+            except Exception as e:
+                failures[id] = e
+    return topics, calls, failures
+
 def createTable():
     """Creates the questions table if it doesn't already exist."""
     conn = sqlite3.connect("questions.db")
@@ -87,40 +195,430 @@ def createTable():
             QuestionNumber TEXT,
             Topics TEXT,
             Module TEXT,
-            Difficulty TEXT
+            Difficulty TEXT,
+            ContentHash TEXT,
+            ClassifierModel TEXT,
+            PromptVersion INTEGER
         )
     """)
+    migrateTable(conn)
+    ensure_schema(conn)
+    vocabulary.ensure_schema(conn)
 
     conn.commit()
     conn.close()
     print("✅ Table 'questions' ready.")
 
-def packageData(id: str, median: int, module: str):
-    extract = extractData(id)
-    year, paper, questionNumber = extract[0], extract[1], extract[2]
+# Provenance of each classification, added to databases created before it was recorded
+PROVENANCE_COLUMNS = [("ContentHash", "TEXT"), ("ClassifierModel", "TEXT"), ("PromptVersion", "INTEGER")]
+
+def migrateTable(conn: sqlite3.Connection):
+    '''
+    Adds any missing provenance columns to an existing questions table
+    '''
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(questions)")}
+    for column, kind in PROVENANCE_COLUMNS:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE questions ADD COLUMN {column} {kind}")
+    conn.commit()
+
+COLUMNS = ["QuestionID", "Year", "Paper", "QuestionNumber", "Topics", "Module", "Difficulty",
+           "ContentHash", "ClassifierModel", "PromptVersion"]
+
+INSERT_SQL = f"""
+    INSERT OR REPLACE INTO questions
+    ({', '.join(COLUMNS)})
+    VALUES ({', '.join('?' * len(COLUMNS))})
+"""
+
+def buildRow(id: str, median: int, module: str, topic: str, contentHash: str) -> tuple:
+    '''
+    Builds the questions table row for a classified question
+    '''
+    year, paper, questionNumber = extractData(id)
     skill = difficulty(median)
-    topic = uploadPdf(id)
     paper = "Paper " + str(paper)
     questionNumber = "Question " + str(questionNumber)
+    return (id, year, paper, questionNumber, topic, module, skill, contentHash, MODEL, PROMPT_VERSION)
+
+def hashPdf(path: pathlib.Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+def loadRows(conn: sqlite3.Connection, ids: list[str]) -> dict[str, tuple]:
+    '''
+    Returns the stored rows (in COLUMNS order) of whichever ids are already in the table
+
+    Reads an unmigrated table as it is, with NULL for any provenance column it
+    lacks, and a missing table as an empty one, so it never has to write.
+    '''
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(questions)")}
+    if not existing:
+        return {}
+    select = ", ".join(column if column in existing else "NULL" for column in COLUMNS)
+    rows = {}
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        for row in conn.execute(
+            f"SELECT {select} FROM questions WHERE QuestionID IN ({', '.join('?' * len(chunk))})",
+            chunk
+        ):
+            rows[row[0]] = row
+    return rows
+
+def staleReason(stored: tuple, contentHash: str):
+    '''
+    Says why a question needs classifying ("new", "pdf", "model" or "prompt"), or None if its stored topic still holds
+    '''
+    if stored is None:
+        return "new"
+    if stored[7] != contentHash:
+        return "pdf"
+    if stored[8] != MODEL:
+        return "model"
+    if stored[9] != PROMPT_VERSION:
+        return "prompt"
+    return None
+
+def sameRow(a: tuple, b: tuple) -> bool:
+    # Year goes in as an int but comes back as TEXT, so compare the stored forms
+    return [None if v is None else str(v) for v in a] == [None if v is None else str(v) for v in b]
+
+def readManifest(path: str) -> list[tuple[str, int, str]]:
+    '''
+    Reads a CSV or JSONL manifest of (id, median, module) entries
+    '''
+    entries = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    entries.append((record["id"], int(record["median"]), record["module"]))
+        else:
+            for record in csv.reader(f):
+                if not record or record[0].strip().lower() == "id":
+                    continue
+                entries.append((record[0].strip(), int(record[1]), record[2].strip()))
+    return entries
+
+class StageTimer:
+    '''
+    Thread-safe accumulator of per-stage wall clock time
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+        self.counts = {}
+        self.calls = 0
+        self.classified = 0
+
+    def record(self, stage: str, seconds: float):
+        with self.lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def recordCalls(self, calls: int, questions: int):
+        with self.lock:
+            self.calls += calls
+            self.classified += questions
+
+    def report(self, stored: int, failed: list, elapsed: float):
+        rate = stored / (elapsed / 60) if elapsed > 0 else 0.0
+        print(f"Ingested {stored} questions in {elapsed:.1f}s ({rate:.1f} questions/min)")
+        for stage, total in self.totals.items():
+            count = self.counts[stage]
+            print(f"  {stage:<9} {total:8.2f}s total  {total / count:6.2f}s avg  ({count} runs)")
+        if self.classified:
+            perQuestion = self.totals.get("classify", 0.0) / self.classified
+            print(f"  Gemini    {self.calls} calls for {self.classified} questions "
+                  f"({self.classified - self.calls} saved, {perQuestion:.2f}s per question)")
+            limiter = gemini.metrics()
+            print(f"  limiter   {limiter['throttled']} throttled, concurrency now {limiter['concurrency_limit']}, "
+                  f"wait p50 {limiter.get('wait_p50', 0):.2f}s p95 {limiter.get('wait_p95', 0):.2f}s")
+        summary = tracing.tracer.summary()
+        if summary:
+            print("\n".join(tracing.format_summary(summary)))
+        for id, error in failed:
+            print(f"  failed {id}: {error}")
+
+class BadQuestionId(ValueError):
+    '''
+    A manifest id that extractData cannot parse; retrying will not help
+    '''
+
+def ingestManifest(path: str, workers: int = 4, batch_size: int = 25, classify_batch: int = 1,
+                   journal: IngestJournal = None):
+    '''
+    Adds every question in a manifest to the ingestion journal, then works through it
+    '''
+    journal = journal or IngestJournal()
+    journal.enqueue(readManifest(path))
+    runJournal(journal, workers, batch_size, classify_batch)
 
+def runJournal(journal: IngestJournal, workers: int = 4, batch_size: int = 25, classify_batch: int = 1,
+               wait_for_retries: bool = True):
+    '''
+    Ingests every unfinished job in the journal, resuming each from its last completed step
+
+    Due jobs are run in rounds through the pipeline; failures are rescheduled
+    by the journal with backoff, and unless wait_for_retries is False the run
+    sleeps until the next retry is due and goes again. Once every job is
+    stored the journal is cleared, so the next manifest starts afresh.
+    '''
+    tracing.tracer.reset() # So the span summary in the report covers this run alone
+    timer = StageTimer()
+    totals = {"stored": 0, "skipped": 0}
     conn = sqlite3.connect("questions.db")
-    cursor = conn.cursor()
+    start = time.perf_counter()
+    try:
+        while True:
+            jobs = journal.ready()
+            if jobs:
+                runRound(jobs, journal, conn, timer, totals, workers, batch_size, classify_batch)
+                continue
+            delay = journal.next_retry()
+            if delay is None or not wait_for_retries:
+                break
+            print(f"Waiting {delay:.0f}s for the next retry")
+            time.sleep(delay)
+    except KeyboardInterrupt:
+        print("Interrupted; run with --resume to carry on from the journal")
+    finally:
+        conn.close()
 
-    cursor.execute("""
-        INSERT OR REPLACE INTO questions
-        (QuestionID, Year, Paper, QuestionNumber, Topics, Module, Difficulty)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (id, year, paper, questionNumber, topic, module, skill))
+    givenUp = journal.given_up()
+    timer.report(totals["stored"], givenUp, time.perf_counter() - start)
+    if totals["skipped"]:
+        print(f"  skipped {totals['skipped']} unchanged questions")
+    unfinished = {state: n for state, n in journal.counts().items() if state != "stored"}
+    if unfinished:
+        print(f"  left in the journal: {unfinished}")
+    elif not givenUp:
+        journal.clear()
 
-    conn.commit()
-    conn.close()
+def runRound(jobs: list, journal: IngestJournal, conn: sqlite3.Connection, timer: StageTimer,
+             totals: dict, workers: int, batch_size: int, classify_batch: int):
+    '''
+    Runs one batch of due jobs through the pipeline, overlapping download, classify and persist stages
+
+    Jobs already classified go straight to the database; the rest are
+    downloaded (from the PDF cache if a previous run fetched them) and
+    classified. Every step is recorded in the journal as it completes.
+    '''
+    existing = loadRows(conn, [job.id for job in jobs])
+    results = queue.Queue()
+    stopping = threading.Event()
+    # Caps how many downloaded-but-unclassified questions are queued for Gemini
+    inFlight = threading.BoundedSemaphore(workers * 2 * classify_batch)
+    toFetch = [job for job in jobs if job.state != "classified"]
+    pending, pendingLock = [], threading.Lock()
+    downloaded = [0]
+
+    for job in jobs:
+        if job.state == "classified":
+            results.put((job.id, buildRow(job.id, job.median, job.module, job.topic, job.content_hash)))
+
+    with ThreadPoolExecutor(workers) as downloadPool, \
+         ThreadPoolExecutor(workers) as classifyPool:
+
+        def classifyStage(group):
+            jobs = {job.id: (job, contentHash) for job, _, contentHash in group}
+            reported = set()
+
+            def onTopic(id, topic):
+                # Journaled as soon as it is known, so a failing fallback for another question can't lose it
+                job, contentHash = jobs[id]
+                journal.classified(id, contentHash, topic)
+                results.put((id, buildRow(id, job.median, job.module, topic, contentHash)))
+                reported.add(id)
+
+            try:
+                if stopping.is_set():
+                    return
+                with span("classify", questions=len(group)) as classify:
+                    _, calls, failures = classifyBatch({job.id: pdfPath for job, pdfPath, _ in group}, onTopic)
+                timer.record("classify", classify.duration)
+                timer.recordCalls(calls, len(group))
+                for id, error in failures.items():
+                    results.put((id, error))
+                    reported.add(id)
+            except Exception as e:
+                for id in jobs:
+                    if id not in reported:
+                        results.put((id, e))
+            finally:
+                for _ in group:
+                    inFlight.release()
+
+        def queueForClassify(item):
+            # Groups downloads into batches; the last download flushes whatever is left
+            with pendingLock:
+                if item is not None:
+                    pending.append(item)
+                downloaded[0] += 1
+                if len(pending) < classify_batch and downloaded[0] < len(toFetch):
+                    return
+                group = pending[:]
+                pending.clear()
+            if group and not stopping.is_set():
+                classifyPool.submit(classifyStage, group)
+
+        def downloadStage(job):
+            if stopping.is_set():
+                inFlight.release()
+                return
+            try:
+                try:
+                    extractData(job.id)
+                except (ValueError, IndexError) as e:
+                    raise BadQuestionId(f"cannot parse question id {job.id!r}") from e
+                with span("download", question=job.id, source="cache") as download:
+                    pdfPath = pdfCache.path(job.id)
+                    contentHash = hashPdf(pdfPath)
+                timer.record("download", download.duration)
+                stored = existing.get(job.id)
+                if staleReason(stored, contentHash) is None:
+                    # Same PDF, model and prompt: keep the stored topic, only the median or module can have moved
+                    journal.classified(job.id, contentHash, stored[4])
+                    row = buildRow(job.id, job.median, job.module, stored[4], contentHash)
+                    results.put((job.id, None if sameRow(row, stored) else row))
+                    item = None
+                else:
+                    journal.downloaded(job.id, contentHash)
+                    item = (job, pdfPath, contentHash)
+            except Exception as e:
+                results.put((job.id, e))
+                item = None
+            if item is None:
+                inFlight.release()
+            queueForClassify(item)
+
+        def feed():
+            for job in toFetch:
+                inFlight.acquire()
+                if stopping.is_set():
+                    return
+                downloadPool.submit(downloadStage, job)
+
+        threading.Thread(target=feed, daemon=True).start()
+
+        batch = []
+
+        def flush():
+            with span("db.store", rows=len(batch)) as store:
+                with vocabulary.tracking(conn, batch):
+                    conn.executemany(INSERT_SQL, batch)
+                    conn.commit()
+                journal.stored([row[0] for row in batch])
+            timer.record("store", store.duration)
+            batch.clear()
+
+        try:
+            for _ in jobs:
+                id, outcome = results.get()
+                if isinstance(outcome, Exception):
+                    delay = journal.failed(id, outcome, retry=not isinstance(outcome, BadQuestionId))
+                    retry = f"retrying in {delay:.0f}s" if delay is not None else "giving up"
+                    print(f"  {id} failed ({outcome}), {retry}")
+                    continue
+                if outcome is None:
+                    journal.stored([id])
+                    totals["skipped"] += 1
+                    continue
+                batch.append(outcome)
+                totals["stored"] += 1
+                if len(batch) >= batch_size:
+                    flush()
+        except KeyboardInterrupt:
+            # Keep what is finished; in-flight work is journaled by the stages as it completes
+            stopping.set()
+            if batch:
+                flush()
+            raise
+        if batch:
+            flush()
+
+def planManifest(path: str, workers: int = 4, classify_batch: int = 1) -> dict[str, int]:
+    '''
+    Dry run of ingestManifest: reports how many Gemini calls a refresh would make, without making any
+
+    PDFs are still fetched (through the cache) so their hashes can be compared,
+    but nothing is classified or written: questions.db is opened read-only and
+    not created or migrated.
+    '''
+    entries = readManifest(path)
+    existing = {}
+    if os.path.exists("questions.db"):
+        conn = sqlite3.connect("file:questions.db?mode=ro", uri=True)
+        existing = loadRows(conn, [entry[0] for entry in entries])
+        conn.close()
+
+    def reason(entry):
+        id = entry[0]
+        try:
+            return staleReason(existing.get(id), hashPdf(pdfCache.path(id)))
+        except Exception as e:
+            print(f"  cannot check {id}: {e}")
+            return "unavailable"
+
+    with ThreadPoolExecutor(workers) as pool:
+        reasons = list(pool.map(reason, entries))
+
+    counts = {}
+    for r in reasons:
+        counts[r or "unchanged"] = counts.get(r or "unchanged", 0) + 1
+    toClassify = sum(n for r, n in counts.items() if r not in ("unchanged", "unavailable"))
+    calls = math.ceil(toClassify / classify_batch)
+    print(f"Dry run of {len(entries)} questions: {toClassify} to classify in {calls} Gemini calls "
+          f"(batches of {classify_batch}), {counts.get('unchanged', 0)} unchanged")
+    for r, n in sorted(counts.items()):
+        print(f"  {r:<11} {n}")
+    return counts
+
+api_key = os.environ.get("GOOGLE_API_TOKEN_QUESTION")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify past paper questions into questions.db")
+    parser.add_argument("manifest", nargs="?", help="CSV/JSONL manifest of id, median, module for batch ingestion")
+    parser.add_argument("--workers", type=int, default=4, help="Worker threads per pipeline stage")
+    parser.add_argument("--batch-size", type=int, default=25, help="Rows per database transaction")
+    parser.add_argument("--classify-batch", type=int, default=1, help="Questions classified per Gemini request")
+    parser.add_argument("--dry-run", action="store_true", help="Report how many Gemini calls the manifest would cost, and stop")
+    parser.add_argument("--resume", action="store_true", help="Finish the jobs left in the ingestion journal by an interrupted run")
+    parser.add_argument("--archive", action="store_true", help="Append newly ingested questions to the packed PDF archive afterwards")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        if not args.manifest:
+            sys.exit("--dry-run needs a manifest.")
+        planManifest(args.manifest, args.workers, args.classify_batch)
+        sys.exit()
+
+    if not api_key:
+        sys.exit("Missing GOOGLE_API_TOKEN_QUESTION environment variable.")
+
+    if args.manifest:
+        createTable()
+        ingestManifest(args.manifest, args.workers, args.batch_size, args.classify_batch)
+        if args.archive:
+            pdfArchive.mirror(cache=pdfCache)
+        sys.exit()
 
-api_key=os.environ["GOOGLE_API_TOKEN_QUESTION"]
+    if args.resume:
+        createTable()
+        runJournal(IngestJournal(), args.workers, args.batch_size, args.classify_batch)
+        if args.archive:
+            pdfArchive.mirror(cache=pdfCache)
+        sys.exit()
 
-id = ""
-type = input("Insert Module:    ")
-median = -2
-while median != -3:
-    median = int(input("Insert Median:      "))
-    id = input("Insert ID:      ")
-    packageData(id, median, type)
\ No newline at end of file
+    createTable()
+    journal = IngestJournal()
+    id = ""
+    type = input("Insert Module:    ")
+    median = -2
+    while median != -3:
+        median = int(input("Insert Median:      "))
+        id = input("Insert ID:      ")
+        # Journaled like a manifest, so a failure is reported and left for --resume instead of ending the session
+        journal.enqueue([(id, median, type)])
+        runJournal(journal, workers=1, wait_for_retries=False)
@@ -0,0 +1,81 @@
+import os
+import json
+import pathlib
+from types import SimpleNamespace
+
+os.environ.setdefault("QUESTION_TRACE", "off")
+os.environ.setdefault("GEMINI_LIMITER", "off")
+
+import pytest
+
+import storeData
+from ingestJournal import IngestJournal
+
+def test_enqueue_reopens_stored_job_with_new_values(tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal.db"), max_attempts=2)
+    journal.enqueue([("y2020p1q1", 10, "Algorithms 1"), ("bad", 5, "Databases")])
+    journal.stored(["y2020p1q1"])
+    journal.failed("bad", ValueError("cannot parse"), retry=False)
+    assert [id for id, _ in journal.given_up()] == ["bad"]
+
+    journal.enqueue([("y2020p1q1", 18, "Algorithms 2")])
+
+    (job,) = [job for job in journal.ready() if job.id == "y2020p1q1"]
+    assert (job.state, job.median, job.module) == ("pending", 18, "Algorithms 2")
+
+def test_enqueue_keeps_progress_of_unfinished_job(tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal.db"))
+    journal.enqueue([("y2020p1q1", 10, "Algorithms 1")])
+    journal.classified("y2020p1q1", "hash", "Graphs")
+
+    journal.enqueue([("y2020p1q1", 12, "Algorithms 1")])
+
+    (job,) = journal.ready()
+    assert (job.state, job.topic, job.median) == ("classified", "Graphs", 12)
+
+class BatchClient:
+    """Answers batch requests for every question except `missing`, and counts the requests."""
+    def __init__(self, missing: str):
+        self.missing = missing
+        self.requests = []
+        self.models = SimpleNamespace(generate_content=self.generate_content)
+
+    def generate_content(self, model, contents, config):
+        ids = [part.split()[1].rstrip(":") for part in contents if isinstance(part, str) and part.startswith("Question ")]
+        self.requests.append(ids)
+        return SimpleNamespace(text=json.dumps({id: f"Topic {id}" for id in ids if id != self.missing}))
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pdf = tmp_path / "question.pdf"
+    pdf.write_bytes(b"%PDF-1.4 stand-in")
+    monkeypatch.setattr(storeData.pdfCache, "path", lambda id, url=None: pathlib.Path(pdf))
+    storeData.createTable()
+    return tmp_path
+
+def test_failed_fallback_keeps_topics_from_the_batch(workspace, monkeypatch):
+    ids = ["y2020p1q1", "y2020p1q2", "y2020p1q3"]
+    client = BatchClient(missing="y2020p1q3")
+    monkeypatch.setattr(storeData, "getClient", lambda: client)
+
+    def unavailable(path):
+        raise RuntimeError("500 INTERNAL")
+    monkeypatch.setattr(storeData, "classifyPdf", unavailable)
+
+    journal = IngestJournal("journal.db", backoff=600)
+    journal.enqueue([(id, 10, "Algorithms 1") for id in ids])
+    storeData.runJournal(journal, workers=1, classify_batch=3, wait_for_retries=False)
+
+    assert journal.counts() == {"stored": 2, "downloaded": 1}
+    assert client.requests == [ids]
+
+    # The retry only asks about the question that failed
+    fallbacks = []
+    monkeypatch.setattr(storeData, "classifyPdf", lambda path: fallbacks.append(path) or "Topic retried")
+    journal.enqueue([("y2020p1q3", 10, "Algorithms 1")])
+    storeData.runJournal(journal, workers=1, classify_batch=3, wait_for_retries=False)
+
+    assert client.requests == [ids]
+    assert len(fallbacks) == 1
+    assert journal.counts() == {}
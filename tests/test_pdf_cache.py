@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from pdfCache import PdfCache
+
+class Host:
+    """Session stand-in serving one PDF, or failing every request once offline is set."""
+    def __init__(self, content: bytes):
+        self.content = content
+        self.offline = False
+        self.requests = 0
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests += 1
+        if self.offline:
+            raise requests.ConnectionError("network is unreachable")
+        return SimpleNamespace(status_code=200, content=self.content, headers={"ETag": '"v1"'},
+                               raise_for_status=lambda: None)
+
+def test_stale_entry_is_served_when_revalidation_fails(tmp_path):
+    host = Host(b"%PDF-1.4 question")
+    cache = PdfCache(str(tmp_path / "cache"), max_age=0, session=host)
+    cached = cache.path("y2020p1q1")
+
+    host.offline = True
+    assert cache.path("y2020p1q1") == cached
+    assert cache.get("y2020p1q1") == b"%PDF-1.4 question"
+    assert host.requests == 3 # It did try to revalidate each time
+
+def test_missing_entry_still_raises_when_offline(tmp_path):
+    host = Host(b"%PDF-1.4 question")
+    host.offline = True
+    cache = PdfCache(str(tmp_path / "cache"), session=host)
+
+    with pytest.raises(requests.ConnectionError):
+        cache.path("y2020p1q1")
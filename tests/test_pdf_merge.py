@@ -0,0 +1,48 @@
+import io
+import pathlib
+import threading
+
+import pytest
+from PyPDF2 import PdfReader
+
+from pdfMerge import merge_files, streaming_supported, ExportCancelled, PYPDF2_VERSION
+
+SAMPLE = pathlib.Path(__file__).resolve().parent.parent / "gemini.pdf"
+
+def test_installed_pypdf2_is_the_pinned_release():
+    # Fails on an upgrade, so the merger's use of PyPDF2 internals is checked before PYPDF2_VERSION moves
+    assert streaming_supported(), f"StreamingPdfMerger is only tested with PyPDF2 {PYPDF2_VERSION}"
+
+@pytest.mark.parametrize("memory_limit", [1, 16 * 1024 * 1024]) # Flushing after every page, and once per input
+def test_merged_file_reads_back_strictly(tmp_path, memory_limit):
+    output = tmp_path / "merged.pdf"
+    sources = [str(SAMPLE)] * 4 + [io.BytesIO(SAMPLE.read_bytes())] # Paths and an archive-style file object
+
+    deduplicated = merge_files(sources, str(output), memory_limit)
+
+    original = PdfReader(str(SAMPLE), strict=True)
+    merged = PdfReader(str(output), strict=True)
+    assert len(merged.pages) == 5 * len(original.pages)
+    expected = [page.extract_text() for page in original.pages] * 5
+    assert [page.extract_text() for page in merged.pages] == expected
+    assert deduplicated > 0 # The repeated fonts and images are written once
+    assert output.stat().st_size < 5 * SAMPLE.stat().st_size
+
+class CancelAfter(threading.Event):
+    """Reads as set from the check after the first checks, to cancel a merge part way through."""
+    def __init__(self, checks: int):
+        super().__init__()
+        self.checks = checks
+
+    def is_set(self) -> bool:
+        self.checks -= 1
+        return self.checks < 0
+
+def test_cancelled_merge_leaves_no_output(tmp_path):
+    output = tmp_path / "merged.pdf"
+    pages = len(PdfReader(str(SAMPLE)).pages)
+
+    with pytest.raises(ExportCancelled):
+        merge_files([str(SAMPLE)] * 3, str(output), memory_limit=1, cancel=CancelAfter(2 * pages))
+
+    assert list(tmp_path.iterdir()) == [] # Neither the output nor the partly written temporary file
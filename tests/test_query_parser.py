@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import pytest
+
+from queryParser import QueryParser, expand_numbers
+
+@pytest.fixture
+def parser():
+    return QueryParser(SimpleNamespace(
+        years=[str(year) for year in range(2005, 2025)],
+        papers=[f"Paper {n}" for n in range(1, 4)],
+        questions=[f"Question {n}" for n in range(1, 13)],
+        difficulties=["Easy", "Medium", "Hard"],
+        topics=["Graph Algorithms", "Hash Tables", "Finite Automata", "Finite Automata Theory"],
+        modules=["Algorithms 1", "Databases"],
+    ))
+
+def test_expand_numbers_reads_ranges_and_lists():
+    assert expand_numbers("1, 3 and 5 to 7") == [1, 3, 5, 6, 7]
+    assert expand_numbers("9-7") == [7, 8, 9]
+
+def test_year_ranges_and_lists(parser):
+    assert parser.parse("2018 to 2020").categories == ["2018", "2019", "2020"]
+    assert parser.parse("2010, 2012 or 2014").categories == ["2010", "2012", "2014"]
+    assert parser.parse("1990-2006").categories == ["2005", "2006"] # Only years in the vocabulary
+
+def test_paper_and_question_lists(parser):
+    parsed = parser.parse("papers 1 and 3 questions 2-4")
+    assert parsed.categories == ["Paper 1", "Paper 3", "Question 2", "Question 3", "Question 4"]
+    assert parsed.residual == ""
+
+def test_longest_name_wins(parser):
+    assert parser.parse("finite automata theory").categories == ["Finite Automata Theory"]
+
+def test_structured_query_resolves_locally(parser):
+    parsed = parser.parse("show me hard graph algorithms questions from 2019 and 2020")
+    assert parsed == (["Graph Algorithms", "2019", "2020", "Hard"], "")
+
+@pytest.mark.parametrize("query, residual", [
+    ("data structures", "data structures"),
+    ("list comprehensions", "list comprehensions"),
+    ("big data processing", "big data processing"),
+    ("time complexity of heaps", "time complexity of heaps"),
+    ("union find", "union find"),
+    ("divide-and-conquer", "divide-and-conquer"),
+    ("find all questions on red black trees", "red black trees"),
+    ("hard questions on binary trees", "binary trees"),
+    ("paper 2 dynamic programming", "dynamic programming"),
+    ("2019 to 2021 network protocols and routing", "network protocols and routing"),
+])
+def test_residual_keeps_phrases_whole(parser, query, residual):
+    assert parser.parse(query).residual == residual
+
+def test_filler_around_a_removed_span_is_trimmed(parser):
+    parsed = parser.parse("questions on hash tables and on memory management from 2020")
+    assert parsed == (["Hash Tables", "2020"], "memory management")
@@ -0,0 +1,92 @@
+import os
+import time
+import threading
+
+os.environ.setdefault("GEMINI_LIMITER", "off")
+
+from rateLimiter import RateLimiter, INTERACTIVE, BULK
+
+# Two limiters on one database stand in for the search GUI and an ingestion run in separate processes
+def limiters(tmp_path, concurrency=2, **kwargs):
+    path = str(tmp_path / "limiter.db")
+    return [RateLimiter(rate=1000, burst=1000, concurrency=concurrency, max_concurrency=concurrency, path=path, **kwargs)
+            for _ in range(2)]
+
+def run(threads):
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def test_concurrency_limit_covers_every_process(tmp_path):
+    search, ingest = limiters(tmp_path)
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def request():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+
+    run([threading.Thread(target=limiter.call, args=(request,)) for limiter in (search, ingest) for _ in range(4)])
+
+    assert peak[0] == 2
+    assert search.metrics()["granted"] == 8
+
+def test_interactive_caller_goes_ahead_of_bulk_queued_in_another_process(tmp_path):
+    search, ingest = limiters(tmp_path, concurrency=1, interactive_window=0)
+    started = []
+
+    def request(name, seconds=0.0):
+        started.append(name)
+        time.sleep(seconds)
+
+    first = threading.Thread(target=ingest.call, args=(lambda: request("bulk 1", 0.3),))
+    first.start()
+    time.sleep(0.05)
+    queued = [threading.Thread(target=ingest.call, args=(lambda n=n: request(f"bulk {n}"),)) for n in (2, 3)]
+    for thread in queued:
+        thread.start()
+    time.sleep(0.05)
+    run([threading.Thread(target=search.call, args=(lambda: request("search"), INTERACTIVE))])
+    for thread in [first] + queued:
+        thread.join()
+
+    assert started == ["bulk 1", "search", "bulk 2", "bulk 3"]
+
+def test_bulk_callers_keep_a_slot_free_once_another_process_has_searched(tmp_path):
+    search, ingest = limiters(tmp_path)
+    search.call(lambda: None, INTERACTIVE)
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def request():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+
+    run([threading.Thread(target=ingest.call, args=(request, BULK)) for _ in range(4)])
+
+    assert peak[0] == 1
+
+def test_bulk_only_process_uses_the_whole_limit(tmp_path):
+    _, ingest = limiters(tmp_path)
+    ingest.acquire(BULK)
+    holder = threading.Thread(target=ingest.acquire, args=(BULK,))
+    holder.start()
+    holder.join(timeout=1)
+
+    assert not holder.is_alive()
+    assert ingest.metrics()["active"] == 2
+
+def test_throttling_seen_by_one_process_slows_the_other(tmp_path):
+    search, ingest = limiters(tmp_path, concurrency=4)
+    ingest.acquire(BULK)
+    ingest.release(False)
+
+    assert search.metrics()["concurrency_limit"] == 2
+    assert search.metrics()["throttled"] == 1
@@ -0,0 +1,27 @@
+import os
+import pathlib
+
+os.environ.setdefault("QUESTION_TRACE", "off")
+os.environ.setdefault("GEMINI_LIMITER", "off")
+
+import storeData
+
+def test_dry_run_reads_an_unmigrated_table_without_changing_it(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pdf = tmp_path / "question.pdf"
+    pdf.write_bytes(b"%PDF-1.4 stand-in")
+    monkeypatch.setattr(storeData.pdfCache, "path", lambda id, url=None: pathlib.Path(pdf))
+    conn = storeData.sqlite3.connect("questions.db")
+    conn.execute("CREATE TABLE questions (QuestionID TEXT PRIMARY KEY, Year TEXT, Paper TEXT, "
+                 "QuestionNumber TEXT, Topics TEXT, Module TEXT, Difficulty TEXT)")
+    conn.execute("INSERT INTO questions VALUES ('y2020p1q1', '2020', 'Paper 1', 'Question 1', 'Graphs', "
+                 "'Algorithms 1', 'Easy')")
+    conn.commit()
+    schema = conn.execute("SELECT sql FROM sqlite_master").fetchall()
+    (tmp_path / "manifest.csv").write_text("id,median,module\ny2020p1q1,10,Algorithms 1\ny2020p1q2,10,Algorithms 1\n")
+
+    counts = storeData.planManifest("manifest.csv", workers=1)
+
+    assert counts == {"pdf": 1, "new": 1}
+    assert conn.execute("SELECT sql FROM sqlite_master").fetchall() == schema
+    conn.close()
@@ -0,0 +1,44 @@
+import threading
+
+from searchWorker import SearchWorker
+
+def test_new_search_starts_while_a_superseded_llm_stage_is_still_running():
+    llm_started, release_llm, fast_ran = threading.Event(), threading.Event(), threading.Event()
+    published = []
+
+    def llm_stage(query, generation):
+        llm_started.set()
+        release_llm.wait(5)
+        if worker.is_current(generation):
+            published.append(query)
+
+    def run(query, generation):
+        if query == "slow":
+            worker.detach(llm_stage, query, generation)
+        else:
+            fast_ran.set()
+
+    worker = SearchWorker(run)
+    worker.submit("slow")
+    assert llm_started.wait(5)
+
+    worker.submit("fast")
+    assert fast_ran.wait(5) and not release_llm.is_set() # Didn't wait for the slow LLM stage
+
+    release_llm.set()
+    worker._pool.shutdown(wait=True)
+    assert published == [] # The superseded stage's result was dropped
+
+def test_queued_llm_stage_is_cancelled_by_a_newer_search():
+    block = threading.Event()
+    ran = []
+    worker = SearchWorker(lambda query, generation: None, llm_workers=1)
+    worker.detach(block.wait, 5)
+    queued = worker.detach(ran.append, "stale")
+
+    worker.submit("newer")
+    block.set()
+    worker._pool.shutdown(wait=True)
+
+    assert queued.cancelled()
+    assert ran == []
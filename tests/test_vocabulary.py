@@ -0,0 +1,35 @@
+import sqlite3
+
+import pytest
+
+from vocabulary import Vocabulary
+
+def make_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE questions (QuestionID TEXT PRIMARY KEY, Year TEXT, Paper TEXT, "
+                 "QuestionNumber TEXT, Topics TEXT, Module TEXT, Difficulty TEXT)")
+    conn.executemany("INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+def test_load_rebuilds_the_snapshot_when_the_database_file_is_replaced(tmp_path):
+    db, snapshot = tmp_path / "questions.db", tmp_path / "vocabulary.json"
+    make_db(db, [("y2020p1q1", "2020", "Paper 1", "Question 1", "Graphs", "Algorithms 1", "Easy")])
+    assert Vocabulary.load(str(db), str(snapshot)).values("Topics") == ["Graphs"]
+
+    # As a git pull would: a new file without the version table, so its write count starts from 0 again
+    db.unlink()
+    make_db(db, [("y2020p1q1", "2020", "Paper 1", "Question 1", "Graphs", "Algorithms 1", "Easy"),
+                 ("y2030p1q1", "2030", "Paper 1", "Question 1", "Brand New Topic", "Algorithms 1", "Hard")])
+
+    vocabulary = Vocabulary.load(str(db), str(snapshot))
+    assert sorted(vocabulary.values("Topics")) == ["Brand New Topic", "Graphs"]
+    assert "2030" in vocabulary.values("Year")
+
+def test_load_reuses_the_snapshot_of_an_unchanged_database(tmp_path, monkeypatch):
+    db, snapshot = tmp_path / "questions.db", tmp_path / "vocabulary.json"
+    make_db(db, [("y2020p1q1", "2020", "Paper 1", "Question 1", "Graphs", "Algorithms 1", "Easy")])
+    first = Vocabulary.load(str(db), str(snapshot))
+
+    monkeypatch.setattr(Vocabulary, "build", classmethod(lambda *args: pytest.fail("rebuilt")))
+    assert Vocabulary.load(str(db), str(snapshot)).version == first.version
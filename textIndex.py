@@ -0,0 +1,140 @@
+"""
+Offline full-text index of the question PDFs, so searches can match what a question actually asks.
+
+Run from the repository root after ingesting:  python textIndex.py [--workers N]
+"""
+import os
+import re
+import sys
+import time
+import hashlib
+import sqlite3
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from pdfCache import PdfCache
+
+# Stemmed, so "shortest paths" in a question matches a search for "shortest path"
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS question_text (
+        QuestionID TEXT PRIMARY KEY,
+        ContentHash TEXT NOT NULL,
+        Body TEXT NOT NULL,
+        Indexed REAL NOT NULL
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS question_text_fts USING fts5 (
+        Body, content='question_text', content_rowid='rowid', tokenize='porter unicode61'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS question_text_fts_before_insert BEFORE INSERT ON question_text BEGIN
+        INSERT INTO question_text_fts (question_text_fts, rowid, Body)
+        SELECT 'delete', rowid, Body FROM question_text WHERE QuestionID = new.QuestionID;
+    END;
+    CREATE TRIGGER IF NOT EXISTS question_text_fts_after_insert AFTER INSERT ON question_text BEGIN
+        INSERT INTO question_text_fts (rowid, Body) VALUES (new.rowid, new.Body);
+    END;
+    CREATE TRIGGER IF NOT EXISTS question_text_fts_after_delete AFTER DELETE ON question_text BEGIN
+        INSERT INTO question_text_fts (question_text_fts, rowid, Body) VALUES ('delete', old.rowid, old.Body);
+    END;
+    CREATE TRIGGER IF NOT EXISTS question_text_fts_after_update AFTER UPDATE ON question_text BEGIN
+        INSERT INTO question_text_fts (question_text_fts, rowid, Body) VALUES ('delete', old.rowid, old.Body);
+        INSERT INTO question_text_fts (rowid, Body) VALUES (new.rowid, new.Body);
+    END;
+"""
+
+# QuestionID and BM25 rank of every question body matching an FTS5 query; lower rank is a better match
+BODY_MATCH_SQL = """
+    SELECT question_text.QuestionID, bm25(question_text_fts) AS Rank
+    FROM question_text_fts JOIN question_text ON question_text.rowid = question_text_fts.rowid
+    WHERE question_text_fts MATCH ?
+"""
+
+def ensure_schema(conn: sqlite3.Connection):
+    conn.executescript(SCHEMA)
+    conn.commit()
+
+def extract_text(path: str) -> str:
+    """Returns the text of every page of a PDF, whitespace collapsed. Runs in a worker process."""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(path)
+    text = " ".join(page.extract_text() or "" for page in reader.pages)
+    return re.sub(r"\s+", " ", text).strip()
+
+def file_hash(path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def index_pdfs(db_path: str = "questions.db", cache: PdfCache = None, workers: int = None,
+               download_workers: int = 8, batch_size: int = 50) -> dict[str, int]:
+    """
+    Brings the question text index up to date with the questions table.
+
+    PDFs come from the shared cache (fetched concurrently on threads) and are
+    only re-extracted when their content hash differs from the one indexed,
+    so a re-run after ingesting a few questions touches just those. Extraction
+    is CPU-bound, so it is spread across a process pool. Text of questions no
+    longer in the table is dropped.
+    """
+    cache = cache or PdfCache()
+    conn = sqlite3.connect(db_path)
+    ensure_schema(conn)
+    ids = [id for (id,) in conn.execute("SELECT QuestionID FROM questions")]
+    known = dict(conn.execute("SELECT QuestionID, ContentHash FROM question_text"))
+    counts = {"extracted": 0, "unchanged": 0, "failed": 0}
+    start = time.perf_counter()
+
+    def locate(id):
+        try:
+            path = cache.path(id)
+            return id, path, file_hash(path)
+        except Exception as e:
+            print(f"Cannot fetch {id}: {e}")
+            return id, None, None
+
+    with ThreadPoolExecutor(download_workers) as pool:
+        located = list(pool.map(locate, ids))
+    todo = []
+    for id, path, digest in located:
+        if path is None:
+            counts["failed"] += 1
+        elif known.get(id) == digest:
+            counts["unchanged"] += 1
+        else:
+            todo.append((id, path, digest))
+
+    batch = []
+    def flush():
+        conn.executemany("INSERT OR REPLACE INTO question_text VALUES (?, ?, ?, ?)", batch)
+        conn.commit()
+        batch.clear()
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = {pool.submit(extract_text, str(path)): (id, digest) for id, path, digest in todo}
+        for future in as_completed(futures):
+            id, digest = futures[future]
+            try:
+                batch.append((id, digest, future.result(), time.time()))
+                counts["extracted"] += 1
+            except Exception as e:
+                print(f"Cannot extract text from {id}: {e}")
+                counts["failed"] += 1
+                continue
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
+
+    conn.execute("DELETE FROM question_text WHERE QuestionID NOT IN (SELECT QuestionID FROM questions)")
+    conn.commit()
+    conn.close()
+    print(f"Indexed {counts['extracted']} questions in {time.perf_counter() - start:.1f}s "
+          f"({counts['unchanged']} unchanged, {counts['failed']} failed)")
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index the text of every question PDF for full-text search")
+    parser.add_argument("--db", default="questions.db", help="Questions database to index")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Text extraction processes")
+    args = parser.parse_args()
+    counts = index_pdfs(args.db, workers=args.workers)
+    sys.exit(1 if counts["failed"] else 0)
@@ -0,0 +1,208 @@
+"""
+Lightweight tracing spans for searches, exports and ingestion, logged as JSON lines.
+
+Summarise the log from the repository root:  python tracing.py [trace.jsonl]
+Set QUESTION_TRACE to another path to log elsewhere, or to "off" to keep spans in memory only.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import argparse
+import itertools
+import threading
+import logging.handlers
+from collections import deque
+
+TRACE_PATH = "trace.jsonl"
+
+def percentile(samples: list[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+class Span:
+    """One timed stage; attributes added with set() while it runs are logged with it."""
+    __slots__ = ("tracer", "name", "attrs", "id", "parent", "start", "duration", "error", "_t0")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.duration = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def fail(self, error):
+        """Marks the span failed for an error that was handled inside it rather than raised out of it."""
+        self.error = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+
+    def __enter__(self) -> "Span":
+        stack = self.tracer._stack()
+        self.id = next(self.tracer._ids)
+        self.parent = stack[-1].id if stack else None
+        stack.append(self)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, kind, error, traceback):
+        self.duration = time.perf_counter() - self._t0
+        self.tracer._stack().pop()
+        if error is not None:
+            self.error = f"{kind.__name__}: {error}"
+        self.tracer._finish(self)
+        return False
+
+class Tracer:
+    """
+    Times named stages, keeping recent durations in memory and logging every span.
+
+    Spans nest per thread: one opened while another is open on the same thread
+    records it as its parent, so a search's LLM and database spans can be told
+    apart from a concurrent export's. Finished spans are queued to a writer
+    thread that serialises them to a rotating JSONL file (max_bytes per file,
+    with backups old files kept), so the traced code never waits on the disk. The
+    last window durations of each span name feed summary(), which is what the
+    debug panel and the ingestion report show.
+    """
+    def __init__(self, path: str = TRACE_PATH, max_bytes: int = 5 * 1024 * 1024, backups: int = 3,
+                 window: int = 1000):
+        self.path = path
+        self.window = window
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._durations = {}    # name -> deque of recent durations, in seconds
+        self._counts = {}
+        self._errors = {}
+        self._handler = None
+        if path:
+            self._handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                                 encoding="utf-8", delay=True)
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+            self._records = queue.Queue()
+            threading.Thread(target=self._write, name="tracing", daemon=True).start()
+            atexit.register(self.flush)
+
+    def _write(self):
+        # Serialising and writing happen here, off the traced threads
+        while True:
+            record = self._records.get()
+            try:
+                self._handler.handle(logging.makeLogRecord({"msg": json.dumps(record, default=str)}))
+            finally:
+                self._records.task_done()
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name: str, **attrs) -> Span:
+        """Context manager timing the enclosed block as name: with tracer.span("db.page", rows=100) as span: ..."""
+        return Span(self, name, attrs)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            if span.name not in self._durations:
+                self._durations[span.name] = deque(maxlen=self.window)
+            self._durations[span.name].append(span.duration)
+            self._counts[span.name] = self._counts.get(span.name, 0) + 1
+            if span.error:
+                self._errors[span.name] = self._errors.get(span.name, 0) + 1
+        if self._handler is None:
+            return
+        record = {
+            "ts": round(span.start, 6),
+            "name": span.name,
+            "ms": round(span.duration * 1000, 3),
+            "span": span.id,
+            "parent": span.parent,
+            "thread": threading.current_thread().name,
+            "pid": os.getpid(),
+        }
+        if span.error:
+            record["error"] = span.error
+        if span.attrs:
+            record["attrs"] = span.attrs
+        self._records.put(record)
+
+    def summary(self) -> dict[str, dict]:
+        """Per span name: total count and errors, and p50/p95/max/last of the recent durations in seconds."""
+        with self._lock:
+            recent = {name: list(durations) for name, durations in self._durations.items()}
+            counts, errors = dict(self._counts), dict(self._errors)
+        return {
+            name: {
+                "count": counts[name],
+                "errors": errors.get(name, 0),
+                "p50": percentile(durations, 0.5),
+                "p95": percentile(durations, 0.95),
+                "max": max(durations),
+                "last": durations[-1],
+            }
+            for name, durations in sorted(recent.items())
+        }
+
+    def reset(self):
+        """Forgets the in-memory durations, so the next summary covers only what runs after this."""
+        with self._lock:
+            self._durations.clear()
+            self._counts.clear()
+            self._errors.clear()
+
+    def flush(self):
+        """Waits until every span finished so far is written to the log."""
+        if self._handler is not None:
+            self._records.join()
+            self._handler.flush()
+
+def format_summary(summary: dict[str, dict]) -> list[str]:
+    lines = [f"  {'span':<16} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+    for name, stats in summary.items():
+        errors = f"  ({stats['errors']} failed)" if stats["errors"] else ""
+        lines.append(f"  {name:<16} {stats['count']:>7} {stats['p50'] * 1e3:>9.1f} "
+                     f"{stats['p95'] * 1e3:>9.1f} {stats['max'] * 1e3:>9.1f}{errors}")
+    return lines
+
+def summarise_log(path: str = TRACE_PATH) -> dict[str, dict]:
+    """Summarises a trace log and its rotated backups, as Tracer.summary does for the live process."""
+    durations, errors = {}, {}
+    paths = [path] + [f"{path}.{n}" for n in range(1, 100)]
+    for name in paths:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # A line cut short by a crash
+                durations.setdefault(record["name"], []).append(record["ms"] / 1000)
+                if "error" in record:
+                    errors[record["name"]] = errors.get(record["name"], 0) + 1
+    return {
+        name: {"count": len(samples), "errors": errors.get(name, 0), "p50": percentile(samples, 0.5),
+               "p95": percentile(samples, 0.95), "max": max(samples), "last": samples[-1]}
+        for name, samples in sorted(durations.items())
+    }
+
+# The tracer every module in this process reports to
+_path = os.environ.get("QUESTION_TRACE", TRACE_PATH)
+tracer = Tracer(None if _path.lower() in ("", "0", "off", "none") else _path)
+span = tracer.span
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise the p50/p95 latency of each traced stage")
+    parser.add_argument("log", nargs="?", default=TRACE_PATH, help="Trace log to read (rotated backups are included)")
+    args = parser.parse_args()
+    summary = summarise_log(args.log)
+    if not summary:
+        sys.exit(f"No spans in {args.log}")
+    print("\n".join(format_summary(summary)))
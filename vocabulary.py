@@ -0,0 +1,141 @@
+import os
+import json
+import sqlite3
+import contextlib
+from collections import Counter
+
+from storage import atomic_output
+
+FIELDS = ["Year", "Paper", "QuestionNumber", "Topics", "Module", "Difficulty"]
+SNAPSHOT = "vocabulary.json"
+
+# Every write to questions bumps Version, so a snapshot can tell whether it is still current. Database
+# is a random id given to each database file, so a snapshot of a file that has since been swapped for
+# another (by a git pull or a copy, where Version starts again from 0) never matches it.
+SCHEMA = """
+    INSERT INTO questions_version SELECT 0, lower(hex(randomblob(16)))
+        WHERE NOT EXISTS (SELECT 1 FROM questions_version);
+    UPDATE questions_version SET Database = lower(hex(randomblob(16))) WHERE Database IS NULL;
+    CREATE TRIGGER IF NOT EXISTS questions_version_insert AFTER INSERT ON questions BEGIN
+        UPDATE questions_version SET Version = Version + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS questions_version_update AFTER UPDATE ON questions BEGIN
+        UPDATE questions_version SET Version = Version + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS questions_version_delete AFTER DELETE ON questions BEGIN
+        UPDATE questions_version SET Version = Version + 1;
+    END;
+"""
+
+def ensure_schema(conn: sqlite3.Connection):
+    conn.execute("CREATE TABLE IF NOT EXISTS questions_version (Version INTEGER NOT NULL, Database TEXT)")
+    if "Database" not in {row[1] for row in conn.execute("PRAGMA table_info(questions_version)")}:
+        conn.execute("ALTER TABLE questions_version ADD COLUMN Database TEXT") # Tables made before the id
+    conn.executescript(SCHEMA)
+    conn.commit()
+
+def current_version(conn: sqlite3.Connection) -> str:
+    """Identifies what the questions table holds: the database's id and its write version."""
+    version, database = conn.execute("SELECT Version, Database FROM questions_version").fetchone()
+    return f"{database}:{version}"
+
+class Vocabulary:
+    """
+    Distinct values, with counts, of every facet column of the questions table.
+
+    The counts are built in a single scan and saved as a small JSON snapshot
+    tagged with the database's id and write version. Later launches load the
+    snapshot unless the version has moved on or the file is another database,
+    and storeData keeps it current incrementally through tracking() instead of
+    forcing a rebuild.
+    """
+    def __init__(self, counts: dict[str, Counter], version: str, db_path: str):
+        self.counts = counts
+        self.version = version
+        self.db_path = db_path
+
+    def values(self, field: str) -> list[str]:
+        return [value for value, count in self.counts[field].items() if count > 0]
+
+    @classmethod
+    def load(cls, db_path: str = "questions.db", snapshot_path: str = SNAPSHOT) -> "Vocabulary":
+        conn = sqlite3.connect(db_path)
+        try:
+            ensure_schema(conn)
+            version = current_version(conn)
+            snapshot = cls._read(snapshot_path)
+            if snapshot and snapshot.version == version and snapshot.db_path == os.path.abspath(db_path):
+                return snapshot
+            vocabulary = cls.build(conn, version, db_path)
+        finally:
+            conn.close()
+        vocabulary.save(snapshot_path)
+        return vocabulary
+
+    @classmethod
+    def build(cls, conn: sqlite3.Connection, version: str, db_path: str) -> "Vocabulary":
+        """Counts every facet value in one pass over the table."""
+        counts = {field: Counter() for field in FIELDS}
+        for row in conn.execute(f"SELECT {', '.join(FIELDS)} FROM questions"):
+            for field, value in zip(FIELDS, row):
+                if value is not None:
+                    counts[field][str(value)] += 1
+        return cls(counts, version, db_path)
+
+    @classmethod
+    def _read(cls, snapshot_path: str):
+        try:
+            with open(snapshot_path, encoding="utf-8") as f:
+                data = json.load(f)
+            counts = {field: Counter(data["counts"][field]) for field in FIELDS}
+            return cls(counts, data["version"], data["db_path"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, snapshot_path: str = SNAPSHOT):
+        data = {
+            "version": self.version,
+            "db_path": os.path.abspath(self.db_path),
+            "counts": {field: dict(self.counts[field]) for field in FIELDS},
+        }
+        # A reader never sees half a snapshot
+        with atomic_output(snapshot_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+@contextlib.contextmanager
+def tracking(conn: sqlite3.Connection, rows: list[tuple], snapshot_path: str = SNAPSHOT):
+    """
+    Applies an INSERT OR REPLACE of rows (QuestionID first, then FIELDS) to the snapshot.
+
+    Wrap the insert and its commit; the rows being replaced are read first so
+    their counts can be taken back out. If the snapshot was already stale it is
+    left alone and rebuilt on the next load.
+    """
+    ensure_schema(conn)
+    before = current_version(conn)
+    ids = [row[0] for row in rows]
+    replaced = []
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        replaced += conn.execute(
+            f"SELECT {', '.join(FIELDS)} FROM questions WHERE QuestionID IN ({', '.join('?' * len(chunk))})",
+            chunk
+        ).fetchall()
+
+    yield
+
+    snapshot = Vocabulary._read(snapshot_path)
+    if snapshot is None or snapshot.version != before:
+        return
+    for row in replaced:
+        for field, value in zip(FIELDS, row):
+            if value is not None:
+                snapshot.counts[field][str(value)] -= 1
+    for row in rows:
+        for field, value in zip(FIELDS, row[1:]):
+            if value is not None:
+                snapshot.counts[field][str(value)] += 1
+    for field in FIELDS:
+        snapshot.counts[field] = +snapshot.counts[field] # Drop values whose count fell to zero
+    snapshot.version = current_version(conn)
+    snapshot.save(snapshot_path)